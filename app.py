@@ -4,10 +4,12 @@ Main Streamlit application entry point.
 """
 
 import streamlit as st
-from views.auth import show_auth_page, is_authenticated, logout
+from views.auth import show_auth_page, is_authenticated, logout, get_current_user
 from views.dashboard import show_dashboard
+from services.cached_data import get_cached_categories
 from views.upload import show_upload_page
-from views.categorization_review import show_categorization_review
+from views.categorization_review import show_categorization_review, flush_review_writes
+from database.operations import DatabaseOperations
 from database.connection import get_supabase_client
 
 from utils.ui.template_loader import load_template
@@ -105,6 +107,10 @@ def show_main_app():
             st.session_state.last_page = page
             
         if st.session_state.last_page != page:
+            # The review page's background writers stop once it is left
+            if st.session_state.last_page == " Categorieën":
+                if not flush_review_writes(get_current_user().id, DatabaseOperations()):
+                    st.error("Niet alle wijzigingen zijn opgeslagen; ze worden opnieuw geprobeerd op de pagina Categorieën.")
             if page == " Categorieën":
                 st.session_state.hist_reload_needed = True
                 st.session_state.pending_trans_reload = True
@@ -114,7 +120,11 @@ def show_main_app():
         
         # Logout button
         if st.button("Uitloggen", use_container_width=True):
-            logout()
+            # Buffered review edits live in the session that logout clears
+            if flush_review_writes(get_current_user().id, DatabaseOperations()):
+                logout()
+            else:
+                st.error("Niet alle wijzigingen zijn opgeslagen. Probeer opnieuw uit te loggen.")
     
     # Page routing
     if page == " Dashboard":
@@ -131,9 +141,6 @@ def show_settings_page():
     
     st.title("Instellingen")
     
-    from views.auth import get_current_user
-    from database.operations import DatabaseOperations
-    
     user = get_current_user()
     if not user:
         return
@@ -166,10 +173,11 @@ def show_settings_page():
             
             # Also update the "Investeren" category percentage to match
             if success:
-                categories = db_ops.get_categories(user.id)
+                categories = get_cached_categories(user.id)
                 investeren_cat = next((cat for cat in categories if cat['name'] == "Investeren"), None)
                 if investeren_cat:
                     db_ops.update_category_percentage(investeren_cat['id'], int(investment_goal), user.id)
+                    get_cached_categories.clear()
             
             if success:
                 st.success(" Voorkeuren opgeslagen!")
@@ -121,3 +121,9 @@ CHART_CONFIG = {
     "margin": {"l": 50, "r": 50, "t": 50, "b": 50},
     "font_family": "Manrope, sans-serif"
 }
+
+# Tallest the data editors grow before scrolling internally (px)
+MAX_EDITOR_HEIGHT = 600
+
+# Rows sent to a data editor at once; longer lists get a page picker
+EDITOR_PAGE_SIZE = 250
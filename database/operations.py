@@ -4,10 +4,19 @@ Database operations for transactions, categories, and user preferences.
 
 from typing import List, Optional, Dict, Set, Tuple, Union, Any
 from datetime import date, datetime
+from decimal import Decimal
 from database.connection import get_supabase_client
 from models.transaction import Transaction
 from models.category import Category
 
+# Ids per id=in.(...) filter; PostgREST puts the list in the URL (~37 chars per UUID)
+ID_BATCH_SIZE = 150
+
+def _id_batches(ids: List[str]):
+    """Split ids into slices that keep each request URL within gateway limits."""
+    for start in range(0, len(ids), ID_BATCH_SIZE):
+        yield ids[start:start + ID_BATCH_SIZE]
+
 class DatabaseOperations:
     """Handle all database CRUD operations."""
     
@@ -92,7 +101,8 @@ class DatabaseOperations:
     def get_transactions(self, user_id: str, start_date: Optional[date] = None, 
                         end_date: Optional[date] = None, 
                         category: Optional[str] = None,
-                        is_confirmed: Optional[bool] = None) -> List[Dict]:
+                        is_confirmed: Optional[bool] = None,
+                        columns: str = "*") -> List[Dict]:
         """
         Retrieve transactions for a user with optional filters.
         
@@ -102,6 +112,7 @@ class DatabaseOperations:
             end_date: Optional end date filter
             category: Optional category filter
             is_confirmed: Optional confirmation status filter
+            columns: Comma-separated transaction columns to fetch (default all)
             
         Returns:
             List of transaction dictionaries
@@ -111,7 +122,7 @@ class DatabaseOperations:
         
         try:
             # Join with categories to get name and color
-            query = self.client.table("transactions").select("*, categories(name, color)").eq("user_id", user_id)
+            query = self.client.table("transactions").select(f"{columns}, categories(name, color)").eq("user_id", user_id)
             
             if start_date:
                 query = query.gte("datum", start_date.isoformat())
@@ -121,7 +132,18 @@ class DatabaseOperations:
                 if len(category) > 30 and "-" in category: # Simple UUID check
                     query = query.eq("categorie_id", category)
                 else:
-                    query = query.eq("categories.name", category)
+                    # Resolve the name once so the filter hits categorie_id (filtering on the
+                    # embedded categories.name would only blank the join, not drop rows)
+                    category_row = self.get_category_by_name(category, user_id)
+                    if category_row and category == "Overig":
+                        # Uncategorized rows are shown as "Overig" too
+                        query = query.or_(f"categorie_id.eq.{category_row['id']},categorie_id.is.null")
+                    elif category_row:
+                        query = query.eq("categorie_id", category_row['id'])
+                    elif category == "Overig":
+                        query = query.is_("categorie_id", "null")
+                    else:
+                        return []
                     
             if is_confirmed is not None:
                 query = query.eq("is_confirmed", is_confirmed)
@@ -193,6 +215,44 @@ class DatabaseOperations:
             print(f"Error updating transaction: {str(e)}")
             return False
     
+    def bulk_update_transactions(self, updates: List[Dict], user_id: str) -> bool:
+        """
+        Update many transactions with as few requests as possible.
+        Rows sharing an identical payload are sent as UPDATE ... WHERE id IN (...),
+        ID_BATCH_SIZE ids per request; later entries for the same id win.
+        
+        Args:
+            updates: List of dicts, each with an "id" key plus the fields to update
+            user_id: User ID
+            
+        Returns:
+            bool: True if successful
+        """
+        if not self.client:
+            return False
+        if not updates:
+            return True
+        
+        # Merge per id so the last write wins
+        merged: Dict[str, Dict] = {}
+        for row in updates:
+            fields = dict(row)
+            merged.setdefault(fields.pop("id"), {}).update(fields)
+        
+        # Group ids by identical payload
+        groups: Dict[Tuple, List[str]] = {}
+        for transaction_id, fields in merged.items():
+            groups.setdefault(tuple(sorted(fields.items())), []).append(transaction_id)
+        
+        try:
+            for payload, ids in groups.items():
+                for batch in _id_batches(ids):
+                    self.client.table("transactions").update(dict(payload)).in_("id", batch).eq("user_id", user_id).execute()
+            return True
+        except Exception as e:
+            print(f"Error bulk updating transactions: {str(e)}")
+            return False
+    
     def delete_transaction(self, transaction_id: str, user_id: str) -> bool:
         """
         Delete a transaction from the database.
@@ -214,6 +274,30 @@ class DatabaseOperations:
             print(f"Error deleting transaction: {str(e)}")
             return False
 
+    def bulk_delete_transactions(self, transaction_ids: List[str], user_id: str) -> bool:
+        """
+        Delete several transactions, ID_BATCH_SIZE ids per request.
+        
+        Args:
+            transaction_ids: Transaction IDs to delete
+            user_id: User ID for authorization
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        if not self.client:
+            return False
+        if not transaction_ids:
+            return True
+            
+        try:
+            for batch in _id_batches(list(transaction_ids)):
+                self.client.table("transactions").delete().in_("id", batch).eq("user_id", user_id).execute()
+            return True
+        except Exception as e:
+            print(f"Error deleting transactions: {str(e)}")
+            return False
+
     def update_transaction_category(self, transaction_id: str, category_id: str, user_id: str, 
                                     is_confirmed: bool = False, is_lopende_rekening: bool = False, 
                                     transaction_data: Dict = {}) -> bool:
@@ -309,7 +393,8 @@ class DatabaseOperations:
             if response.data:
                 return response.data[0]
             return None
-        except:
+        except Exception as e:
+            print(f"Error fetching category: {str(e)}")
             return None
 
     def create_category(self, category: Category, user_id: str) -> Optional[str]:
@@ -485,13 +570,9 @@ class DatabaseOperations:
 
             for trans_data in transactions_data:
                 try:
-                    # Create temporary Transaction object from DB data
-                    from decimal import Decimal
-                    from models.transaction import Transaction
-                    from datetime import datetime
-                    
-                    t = Transaction(
-                        datum=datetime.strptime(trans_data['datum'], '%Y-%m-%d').date() if isinstance(trans_data['datum'], str) else trans_data['datum'],
+                    # Create temporary Transaction object from DB data (already valid, skip validation)
+                    t = Transaction.model_construct(
+                        datum=date.fromisoformat(trans_data['datum']) if isinstance(trans_data['datum'], str) else trans_data['datum'],
                         bedrag=Decimal(str(trans_data['bedrag'])),
                         naam_tegenpartij=trans_data.get('naam_tegenpartij'),
                         omschrijving=trans_data.get('omschrijving')
@@ -51,6 +51,10 @@ CREATE TABLE public.transactions (
   CONSTRAINT transactions_categorie_id_fkey FOREIGN KEY (categorie_id) REFERENCES public.categories(id)
 );
 
+-- Serves the per-user listings filtered on confirmation, category and period
+CREATE INDEX transactions_user_confirmed_categorie_datum_idx
+  ON public.transactions (user_id, is_confirmed, categorie_id, datum DESC);
+
 -- Table: public.user_preferences
 CREATE TABLE public.user_preferences (
   id uuid NOT NULL DEFAULT uuid_generate_v4(),
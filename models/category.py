@@ -2,6 +2,7 @@
 Data model for categories.
 """
 
+from functools import cached_property
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 
@@ -22,6 +23,16 @@ class Category(BaseModel):
     color: str = "#9ca3af"
     percentage: Optional[int] = 0
     
+    @cached_property
+    def _compiled_rules(self) -> List[tuple]:
+        """Validate the rules once and lowercase their keywords for matching."""
+        compiled = []
+        for rule_dict in self.rules:
+            rule = CategoryRule(**rule_dict)
+            keywords = tuple(keyword.lower() for keyword in rule.contains) if rule.contains else ()
+            compiled.append((rule.field, keywords, rule.condition))
+        return compiled
+    
     def matches(self, transaction) -> bool:
         """
         Check if a transaction matches this category's rules.
@@ -35,28 +46,26 @@ class Category(BaseModel):
         if not self.rules:
             return False
         
-        for rule_dict in self.rules:
-            rule = CategoryRule(**rule_dict)
-            
+        for field, keywords, condition in self._compiled_rules:
             # Check text field matching
-            if rule.contains:
+            if keywords:
                 field_value = ""
-                if rule.field == "naam_tegenpartij":
+                if field == "naam_tegenpartij":
                     field_value = transaction.naam_tegenpartij or ""
-                elif rule.field == "omschrijving":
+                elif field == "omschrijving":
                     field_value = transaction.omschrijving or ""
                 
-                # Case-insensitive matching
+                # Case-insensitive matching (keywords are lowercased once)
                 field_value_lower = field_value.lower()
-                for keyword in rule.contains:
-                    if keyword.lower() in field_value_lower:
+                for keyword in keywords:
+                    if keyword in field_value_lower:
                         return True
             
             # Check bedrag condition
-            if rule.condition:
-                if rule.condition == "positive" and transaction.bedrag > 0:
+            if condition:
+                if condition == "positive" and transaction.bedrag > 0:
                     return True
-                elif rule.condition == "negative" and transaction.bedrag < 0:
+                elif condition == "negative" and transaction.bedrag < 0:
                     return True
         
         return False
@@ -3,17 +3,21 @@ AI Categorization service using Gemini to analyze and categorize transactions.
 """
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 import streamlit as st
 from models.transaction import Transaction
 from config.settings import DEFAULT_CATEGORIES
-from utils.ai_client import AIClient
+from utils.ai_client import get_ai_client
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 import re
 
+# Maximum number of chunk requests in flight at once
+MAX_CONCURRENT_REQUESTS = 4
+
 def _is_bad_name(name: str) -> bool:
     """Check if a name is likely 'gibberish' (dates, numbers, codes)."""
     if not name or len(name.strip()) < 3:
@@ -38,7 +42,7 @@ class AiCategorizer:
     
     def __init__(self):
         """Initialize the AI categorizer using unified AIClient."""
-        self.ai = AIClient()
+        self.ai = get_ai_client()
         self.enabled = self.ai.enabled
             
         if not self.enabled:
@@ -83,13 +87,15 @@ class AiCategorizer:
         # Increase batch size to 100 to minimize API requests
         batch_size = 100
         processed_txns = []
+        chunks = [transactions[i:i + batch_size] for i in range(0, len(transactions), batch_size)]
         
-        for i in range(0, len(transactions), batch_size):
-            chunk = transactions[i:i + batch_size]
-            prompt = self._build_prompt(chunk)
-            
+        # Send the chunk requests concurrently; responses are handled in order on this thread
+        with ThreadPoolExecutor(max_workers=min(MAX_CONCURRENT_REQUESTS, len(chunks))) as pool:
+            requests = [pool.submit(self.ai.generate_content, self._build_prompt(chunk)) for chunk in chunks]
+        
+        for chunk, request in zip(chunks, requests):
             try:
-                content = self.ai.generate_content(prompt)
+                content = request.result()
                 results = self._parse_response(content)
                 
                 if not results:
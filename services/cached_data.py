@@ -0,0 +1,40 @@
+"""
+Cached data access shared by the pages.
+"""
+import streamlit as st
+import pandas as pd
+from datetime import date
+from database.operations import DatabaseOperations
+from typing import List, Dict, Optional
+
+# Counterparty values banks use when there is no name, plus stringified missing values
+PLACEHOLDER_NAMES = ["", "-", "--", "---", "nan", "None"]
+
+def clean_counterparty(names: pd.Series) -> pd.Series:
+    """Replace empty, dash-only or "nan"/"None" counterparty names with "Onbekend"."""
+    return names.where(~names.fillna("").astype(str).str.strip().isin(PLACEHOLDER_NAMES), "Onbekend")
+
+@st.cache_data(ttl=300)
+def get_cached_transactions(user_id: str) -> List[Dict]:
+    """Fetch transactions with caching (5 mins)."""
+    db = DatabaseOperations()
+    # We fetch ALL transactions to handle global filtering first
+    # Ideally should perform filtering at SQL level, but for <10k records this is fine
+    return db.get_transactions(user_id, is_confirmed=True)
+
+@st.cache_data(ttl=300)
+def get_cached_history(user_id: str, start_date: date, end_date: date, category: Optional[str]) -> List[Dict]:
+    """Fetch confirmed transactions for one period/category filter with caching (5 mins)."""
+    db = DatabaseOperations()
+    # Filtered in the query so the row limit applies to the requested period only
+    return db.get_transactions(user_id, start_date=start_date, end_date=end_date, category=category, is_confirmed=True)
+
+def clear_transaction_caches():
+    """Invalidate every cached list of confirmed transactions."""
+    get_cached_transactions.clear()
+    get_cached_history.clear()
+
+@st.cache_data(ttl=300)
+def get_cached_categories(user_id: str) -> List[Dict]:
+    """Fetch categories with caching (5 mins)."""
+    return DatabaseOperations().get_categories(user_id)
@@ -3,6 +3,7 @@ Categorization Engine for automatic transaction categorization.
 Includes rule-based matching and learning system.
 """
 
+from functools import cached_property
 from typing import List, Dict, Optional
 from models.transaction import Transaction
 from models.category import Category
@@ -157,18 +158,21 @@ class CategorizationEngine:
             "rule": new_rule
         }
     
-    def get_category_colors(self) -> Dict[str, str]:
+    @cached_property
+    def category_colors(self) -> Dict[str, str]:
         """
-        Get mapping of category names to colors.
+        Mapping of category names to colors.
+        Built once per engine; categories are fixed after __init__.
         
         Returns:
             Dict of category_name: color
         """
         return {cat.name: cat.color for cat in self.categories}
     
-    def get_category_names(self) -> List[str]:
+    @cached_property
+    def category_names(self) -> List[str]:
         """
-        Get list of all category names.
+        List of all category names, built once per engine.
         
         Returns:
             List of category names
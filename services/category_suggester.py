@@ -49,6 +49,9 @@ class CategorySuggester:
         "Inkomen": ["idefix", "salaris", "loon", "bonus", "teruggave"]
     }
     
+    # Counterparty names that say nothing about the merchant (including KBC's "---")
+    VAGUE_NAMES = frozenset({"", "-", "--", "---", "onbekend", "overschrijving", "betaling", "mededeling", "interne overschrijving"})
+    
     COLORS = [
         "#10b981",  # Green
         "#f59e0b",  # Orange  
@@ -195,8 +198,7 @@ class CategorySuggester:
         description = (t.omschrijving or "").lower()
         
         # 1. Detect vague/generic names (including KBC's "---" or empty)
-        vague_terms = ["", "-", "--", "---", "onbekend", "overschrijving", "betaling", "mededeling", "interne overschrijving"]
-        is_vague = not original_name or original_name.lower() in vague_terms
+        is_vague = not original_name or original_name.lower() in self.VAGUE_NAMES
         
         # 2. Try to find a merchant name in keywords if it's vague
         if is_vague:
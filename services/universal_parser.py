@@ -15,7 +15,7 @@ from datetime import date, datetime
 
 from models.transaction import Transaction
 from utils.text_cleaner import clean_transaction_description
-from utils.ai_client import AIClient
+from utils.ai_client import get_ai_client
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +26,7 @@ class UniversalParser:
     """
     
     def __init__(self):
-        self.ai = AIClient()
+        self.ai = get_ai_client()
         
         # Internal fields we want to map to
         self.target_fields = {
@@ -1,17 +1,9 @@
 
 import os
+import tempfile
 
 file_path = r"C:\Users\malfa\OneDrive\ODILA\Probeersels\FinTrackable\views\dashboard.py"
 
-with open(file_path, 'r', encoding='utf-8') as f:
-    lines = f.readlines()
-
-new_lines = []
-for line in lines:
-    if line.strip() == "":
-        continue
-    new_lines.append(line)
-
 # This naive approach removes ALL empty lines, which might be too aggressive (removing spacing between functions).
 # Better approach: The file view showed explicit double spacing (e.g. line 1 code, line 2 empty, line 3 code).
 # It seems every line of code is followed by an empty line.
@@ -33,8 +25,6 @@ for line in lines:
 # No, looks like `Code \n` everywhere.
 
 # Let's try to remove blank lines.
-cleaned_content = "".join([line for line in lines if line.strip() != ""])
-
 # But wait, indented multiline strings (like the SQL or HTML) rely on newlines.
 # If I remove the empty line inside the f-string:
 # 619:         st.markdown(f"""
@@ -51,7 +41,16 @@ cleaned_content = "".join([line for line in lines if line.strip() != ""])
 # So removing all blank lines is a safe start to recover density. 
 # We can run a formatter later if needed.
 
-with open(file_path, 'w', encoding='utf-8') as f:
-    f.write(cleaned_content)
-
-print(f"Removed {len(lines) - len(new_lines)} empty lines.")
+# Stream line by line into a temp file next to the source, then swap it in.
+removed = 0
+with open(file_path, 'r', encoding='utf-8') as fin, \
+     tempfile.NamedTemporaryFile('w', encoding='utf-8', delete=False, dir=os.path.dirname(file_path)) as fout:
+    tmp_path = fout.name
+    for line in fin:
+        if line.strip():
+            fout.write(line)
+        else:
+            removed += 1
+os.replace(tmp_path, file_path)
+
+print(f"Removed {removed} empty lines.")
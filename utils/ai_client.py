@@ -34,7 +34,7 @@ class AIClient:
                 self.provider = "gemini"
                 self.enabled = True
             except Exception as e:
-                logger.error(f"AI: Gemini initialization failed: {str(e)}")
+                logger.error("AI: Gemini initialization failed: %s", e)
         else:
             logger.warning("AI: No credentials found. AI features will be disabled.")
 
@@ -57,6 +57,12 @@ class AIClient:
                 )
                 return response.text
         except Exception as e:
-            logger.error(f"AI Error ({self.provider}): {str(e)}")
-            raise e
+            logger.error("AI Error (%s): %s", self.provider, e)
+            raise
         return ""
+
+
+@st.cache_resource
+def get_ai_client() -> AIClient:
+    """Return the shared AIClient so provider SDKs are initialized once per process."""
+    return AIClient()
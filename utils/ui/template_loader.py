@@ -1,28 +1,54 @@
 import os
+from functools import lru_cache
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
+# Resolve paths once at import
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+template_dir = os.path.join(_BASE_DIR, "templates")
+
 # Initialize Jinja2 environment
-template_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "templates")
 jinja_env = Environment(
     loader=FileSystemLoader(template_dir),
     autoescape=select_autoescape(['html', 'xml'])
 )
 
+@lru_cache(maxsize=256)
+def _get_template(path: str):
+    """Compile a template once per process."""
+    return jinja_env.get_template(path)
+
+@lru_cache(maxsize=256)
+def _read_raw(path: str):
+    """Read a template file once; missing paths are cached as None too."""
+    full_path = os.path.join(template_dir, path)
+    if not os.path.exists(full_path):
+        return None
+    with open(full_path, "r", encoding="utf-8") as f:
+        return f.read()
+
+@lru_cache(maxsize=256)
+def _render_cached(path: str, kwargs_key: frozenset) -> str:
+    """Render a template for a hashable set of keyword arguments."""
+    return _get_template(path).render(**dict(kwargs_key))
+
 def load_template(path: str, **kwargs) -> str:
     """
     Load and render a template using Jinja2.
     Supports template inheritance (e.g., {% extends 'base.html' %}).
+    Rendered output is cached when all keyword arguments are hashable.
     """
     try:
-        template = jinja_env.get_template(path)
-        return template.render(**kwargs)
+        try:
+            kwargs_key = frozenset(kwargs.items())
+        except TypeError:
+            return _get_template(path).render(**kwargs)
+        return _render_cached(path, kwargs_key)
     except Exception as e:
         # Fallback to simple file read if Jinja fails or file not found in loader
         try:
-            full_path = os.path.join(template_dir, path)
-            if os.path.exists(full_path):
-                with open(full_path, "r", encoding="utf-8") as f:
-                    return f.read()
+            raw = _read_raw(path)
+            if raw is not None:
+                return raw
             return f"<!-- Template Error: {str(e)} -->"
         except Exception:
             return f"<!-- Template Error: {str(e)} -->"
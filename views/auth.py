@@ -1,5 +1,9 @@
+import hmac
 import streamlit as st
 from collections import namedtuple
+from operator import itemgetter
+from utils.ui.template_loader import load_template
+from database.operations import DatabaseOperations
 
 # Simple user model for consistent dot-notation access
 User = namedtuple('User', ['id', 'email', 'first_name', 'second_name'])
@@ -17,15 +21,13 @@ USERS = {
     }
 }
 
+# The login template is static, so render and minify it once per process
+_MINIFIED_LOGIN_HTML = " ".join(load_template("login.html").split())
+
 def show_auth_page():
     """Display the premium authentication page."""
-    from utils.ui.template_loader import load_template
-    
     # We render the login template which includes our base layout
-    html = load_template("login.html")
-    import re
-    minified = re.sub(r'\s+', ' ', html).strip()
-    st.markdown(minified, unsafe_allow_html=True)
+    st.markdown(_MINIFIED_LOGIN_HTML, unsafe_allow_html=True)
     
     # Real functional Streamlit form
     with st.container():
@@ -38,6 +40,22 @@ def show_auth_page():
         with tab_signup:
             show_signup_form()
 
+@st.cache_resource
+def _db_ops():
+    """Shared DatabaseOperations instance for the auth forms."""
+    return DatabaseOperations()
+
+@st.cache_data(ttl=30)
+def _lookup_user(email: str):
+    """Fetch a user record by email, cached briefly to avoid repeated round-trips."""
+    return _db_ops().get_user_by_email(email)
+
+_user_fields = itemgetter(*User._fields)
+
+def _user_from_record(record: dict) -> User:
+    """Build a User from a database user row, ignoring the password column."""
+    return User(*_user_fields(record))
+
 def show_login_form():
     """Display login form."""
     with st.form("login_form"):
@@ -50,17 +68,9 @@ def show_login_form():
                 st.error("Vul alle velden in")
                 return
                 
-            from database.operations import DatabaseOperations
-            db_ops = DatabaseOperations()
-            
-            user_record = db_ops.get_user_by_email(email)
-            if user_record and user_record.get('password') == password:
-                st.session_state['user'] = User(
-                    id=user_record["id"],
-                    email=user_record["email"],
-                    first_name=user_record["first_name"],
-                    second_name=user_record["second_name"]
-                )
+            user_record = _lookup_user(email)
+            if user_record is not None and hmac.compare_digest((user_record.get('password') or '').encode(), password.encode()):
+                st.session_state['user'] = _user_from_record(user_record)
                 st.success(" Succesvol ingelogd!")
                 st.rerun()
             else:
@@ -90,27 +100,20 @@ def show_signup_form():
                 st.error("Wachtwoorden komen niet overeen")
                 return
             
-            from database.operations import DatabaseOperations
-            db_ops = DatabaseOperations()
-            
-            user_record, error = db_ops.create_user(email, password, first_name, second_name)
+            user_record, error = _db_ops().create_user(email, password, first_name, second_name)
             
             if error:
                 st.error(error)
             else:
-                st.session_state['user'] = User(
-                    id=user_record["id"],
-                    email=user_record["email"],
-                    first_name=user_record["first_name"],
-                    second_name=user_record["second_name"]
-                )
+                # Drop any cached "unknown email" lookup for the new account
+                _lookup_user.clear()
+                st.session_state['user'] = _user_from_record(user_record)
                 st.success(" Account succesvol aangemaakt!")
                 st.rerun()
 
 def logout():
     """Handle user logout."""
-    for key in list(st.session_state.keys()):
-        del st.session_state[key]
+    st.session_state.clear()
     st.rerun()
 
 def get_current_user():
@@ -120,6 +123,10 @@ def get_current_user():
     """
     user = st.session_state.get('user', None)
     
+    # Fast path: already migrated (or no user at all)
+    if user is None or type(user) is User:
+        return user
+    
     # Object fixation & migration
     if user and (isinstance(user, dict) or not hasattr(user, 'first_name')):
         if isinstance(user, dict):
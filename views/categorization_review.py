@@ -3,12 +3,20 @@ Transaction categorization review interface.
 Allows users to review and correct automated categorizations.
 """
 
+import random
 import streamlit as st
 from database.operations import DatabaseOperations
-from services.categorization import CategorizationEngine
+from services.ai_categorizer import AiCategorizer
 from views.auth import get_current_user
+from services.cached_data import get_cached_history, clear_transaction_caches, get_cached_categories, clean_counterparty
+from config.settings import MAX_EDITOR_HEIGHT, EDITOR_PAGE_SIZE
 from models.transaction import Transaction
+from models.category import Category
 from decimal import Decimal
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from typing import List, Dict
 
 def show_categorization_review():
     """Display categorization review interface."""
@@ -27,15 +35,271 @@ def show_categorization_review():
     
     with tab1:
         show_pending_review(user.id, db_ops)
+        _pending_write_flusher(user.id, db_ops)
     
     with tab2:
         show_confirmed_history(user.id, db_ops)
+        _history_job_runner(user.id, db_ops)
     
     with tab3:
         show_rules_management(user.id, db_ops)
 
-import pandas as pd
-from datetime import datetime, date, timedelta
+# Palette the quick-add expander picks a default color from
+QUICK_ADD_COLORS = ("#ef4444", "#f97316", "#f59e0b", "#84cc16", "#10b981", "#06b6d4", "#3b82f6", "#8b5cf6", "#ec4899")
+
+# Failed attempts after which a queued history action is given up and its rows are restored
+HISTORY_JOB_MAX_ATTEMPTS = 3
+
+# Shown when an action is refused because earlier edits or history jobs are not in the DB yet
+UNSAVED_WRITES_ERROR = "Eerdere wijzigingen zijn nog niet opgeslagen. Probeer het over enkele seconden opnieuw."
+
+# Text columns covered by the broad search
+SEARCH_COLUMNS = ["Tegenpartij", "Categorie", "Omschrijving", "AI Naam", "AI Motivatie"]
+
+# Columns the editors never show; dropped before the frame is serialized to the frontend
+EDITOR_HIDDEN_COLUMNS = ["Omschrijving", "id", "_search_blob"]
+
+# DB fields of a transaction row and the review column each one fills
+RECORD_COLUMNS = {
+    "datum": "Datum", "naam_tegenpartij": "Tegenpartij", "bedrag": "Bedrag", "categorie": "Categorie",
+    "is_lopende_rekening": "Lopende", "omschrijving": "Omschrijving", "ai_name": "AI Naam",
+    "ai_reasoning": "AI Motivatie", "ai_confidence": "Vertrouwen", "id": "id",
+}
+# Table columns the review reads; categorie is filled from the categories join
+RECORD_FIELDS = ",".join(field for field in RECORD_COLUMNS if field != "categorie")
+
+def _transactions_frame(transactions: List[Dict]) -> pd.DataFrame:
+    """Build the review columns from DB rows in one pass (also yields all columns when empty)."""
+    df = pd.DataFrame.from_records(transactions, columns=list(RECORD_COLUMNS)).rename(columns=RECORD_COLUMNS)
+    df["Datum"] = pd.to_datetime(df["Datum"], format='%Y-%m-%d').dt.date
+    df["Tegenpartij"] = clean_counterparty(df["Tegenpartij"].astype(object))
+    df["Bedrag"] = df["Bedrag"].astype("float64")
+    df["Categorie"] = df["Categorie"].fillna("Overig")
+    df["Lopende"] = df["Lopende"].fillna(False).astype(bool)
+    df["Omschrijving"] = df["Omschrijving"].fillna("")
+    df["Vertrouwen"] = df["Vertrouwen"].fillna(0.0).astype("float64")
+    return df
+
+def _build_search_blob(df: pd.DataFrame) -> pd.Series:
+    """Lowercased concatenation of the searchable columns, one string per row."""
+    blob = df[SEARCH_COLUMNS[0]].astype("string").fillna("")
+    for col in SEARCH_COLUMNS[1:]:
+        blob = blob + "|" + df[col].astype("string").fillna("")
+    return blob.str.lower()
+
+def _search_mask(blob: pd.Series, query: str) -> pd.Series:
+    """Rows of the lowercased search blob containing the whole query as one phrase."""
+    return blob.str.contains(query.lower(), na=False, regex=False)
+
+def _use_arrow_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Store the searchable text columns as Arrow-backed strings for vectorized filtering."""
+    for col in SEARCH_COLUMNS + ["_search_blob"]:
+        df[col] = df[col].astype("string[pyarrow]")
+    return df
+
+# Editable columns and how editor values are stored in the session DF
+EDIT_CASTS = {"Select": bool, "Categorie": str, "Lopende": bool, "Tegenpartij": str, "Omschrijving": str, "Bedrag": float}
+
+def _apply_edits(df: pd.DataFrame, edited_rows: list, columns=EDIT_CASTS):
+    """Write (index, changes) pairs back into the session DF with one .loc call per column."""
+    for col in columns:
+        cast = EDIT_CASTS[col]
+        hits = [(idx, cast(changes[col])) for idx, changes in edited_rows if col in changes]
+        if hits:
+            idxs, values = zip(*hits)
+            df.loc[list(idxs), col] = list(values)
+    
+    text_idxs = [idx for idx, changes in edited_rows if any(col in changes for col in SEARCH_COLUMNS)]
+    if text_idxs:
+        df.loc[text_idxs, "_search_blob"] = _build_search_blob(df.loc[text_idxs])
+
+@st.cache_data
+def _category_options(category_names: tuple) -> List[str]:
+    """Sorted DB category names for the dropdowns, always including "Overig"."""
+    names = sorted(category_names)
+    if "Overig" not in names:
+        names.append("Overig")
+    return names
+
+def _split_category_rules(user_categories: List[Dict]) -> Dict[str, tuple]:
+    """Split each category's rules into its text keywords and the other rules, in one pass."""
+    split = {}
+    for category in user_categories:
+        keywords = set()
+        other_rules = []
+        for rule in category.get('rules') or []:
+            contains = rule.get('contains', [])
+            # Collect keywords from text-based rules
+            if rule.get('field', '') in ('naam_tegenpartij', 'omschrijving') and contains:
+                keywords.update(contains)
+            else:
+                # Keep non-text rules (like amount conditions) preserved
+                other_rules.append(rule)
+        split[category['id']] = (", ".join(sorted(keywords)), other_rules)
+    return split
+
+def _get_cat_name_to_id(user_id: str) -> Dict[str, str]:
+    """Category name -> id map stashed by the last render, rebuilt only if missing."""
+    cat_name_to_id = st.session_state.get("_cat_name_to_id")
+    if cat_name_to_id is None:
+        cat_name_to_id = {c['name']: c['id'] for c in get_cached_categories(user_id)}
+    return cat_name_to_id
+
+def _effective_selection(select, edits: dict) -> np.ndarray:
+    """Select flags of the displayed rows with pending editor changes applied."""
+    selected = np.array(select, dtype=bool)
+    for pos_str, changes in edits.items():
+        pos = int(pos_str)
+        if "Select" in changes and pos < len(selected):
+            selected[pos] = bool(changes["Select"])
+    return selected
+
+def _filter_pending_df(df: pd.DataFrame, search_query: str, cat_filter: str) -> pd.DataFrame:
+    """Apply the pending-review filters, reusing the last result while the inputs are unchanged."""
+    filter_key = (search_query, cat_filter, st.session_state.get("pending_df_version", 0))
+    if st.session_state.get("_pending_filter_key") == filter_key:
+        return st.session_state._pending_filter_result
+    
+    # Masking yields a new frame; the session DF itself is never modified here
+    filtered_df = df
+    if search_query:
+        mask = _search_mask(filtered_df["_search_blob"], search_query)
+        filtered_df = filtered_df[mask]
+    
+    if cat_filter and cat_filter != "Alle Categorieën":
+        filtered_df = filtered_df[filtered_df['Categorie'] == cat_filter]
+    
+    st.session_state._pending_filter_key = filter_key
+    st.session_state._pending_filter_result = filtered_df
+    return filtered_df
+
+def _bump_pending_version():
+    """Mark pending_trans_df as changed so cached filter results are recomputed."""
+    st.session_state.pending_df_version = st.session_state.get("pending_df_version", 0) + 1
+
+def _reset_editor(editor_key: str):
+    """Drop an editor's widget state; its row positions belong to the previous page."""
+    st.session_state.pop(editor_key, None)
+
+def _editor_page(n_rows: int, page_key: str, editor_key: str) -> slice:
+    """Show a pager for lists longer than one page and return the positions of the picked page."""
+    n_pages = -(-n_rows // EDITOR_PAGE_SIZE)
+    if n_pages <= 1:
+        return slice(0, n_rows)
+    if st.session_state.get(page_key, 1) > n_pages:
+        st.session_state[page_key] = n_pages
+    page = st.number_input(f"Pagina (van {n_pages})", min_value=1, max_value=n_pages, step=1,
+                           key=page_key, on_change=_reset_editor, args=(editor_key,))
+    start = (page - 1) * EDITOR_PAGE_SIZE
+    return slice(start, start + EDITOR_PAGE_SIZE)
+
+def _buffer_pending_writes(updates: List[Dict]):
+    """Merge updates into the pending write-behind buffer (latest value per field wins)."""
+    buffer = st.session_state.setdefault("_pending_write_buffer", {})
+    for row in updates:
+        fields = dict(row)
+        buffer.setdefault(fields.pop("id"), {}).update(fields)
+
+def _flush_pending_writes(user_id: str, db_ops: DatabaseOperations) -> bool:
+    """Persist buffered pending-review edits in one batch; False if they are still unwritten."""
+    buffer = st.session_state.get("_pending_write_buffer")
+    if not buffer:
+        return True
+    if db_ops.bulk_update_transactions([{"id": t_id, **fields} for t_id, fields in buffer.items()], user_id):
+        buffer.clear()
+        return True
+    return False
+
+@st.fragment(run_every=2.0)
+def _pending_write_flusher(user_id: str, db_ops: DatabaseOperations):
+    """Periodically flush edits made in the pending editor."""
+    if not _flush_pending_writes(user_id, db_ops):
+        st.error("Wijzigingen konden niet worden opgeslagen. Nieuwe poging over enkele seconden...")
+
+def flush_review_writes(user_id: str, db_ops: DatabaseOperations) -> bool:
+    """Write everything the review page still holds back; call before leaving the page."""
+    pending_written = _flush_pending_writes(user_id, db_ops)
+    history_written = _flush_history_jobs(user_id, db_ops)
+    return pending_written and history_written
+
+def _queue_history_job(action: str, ids: List[str]):
+    """Queue a bulk history write ("unconfirm" or "delete") and hide its rows right away."""
+    st.session_state.setdefault("_history_jobs", []).append((action, ids))
+    
+    df = st.session_state.history_df_state
+    keep = ~df["id"].isin(ids).to_numpy()
+    st.session_state.history_df_state = df[keep]
+    st.session_state.hist_selected = st.session_state.hist_selected[keep]
+    if 'editor_history' in st.session_state: del st.session_state.editor_history
+
+def _move_to_pending(rows: pd.DataFrame, db_category_names: List[str]):
+    """Add just-unconfirmed history rows to the pending DF instead of refetching it."""
+    if 'pending_trans_df' not in st.session_state or st.session_state.get('pending_trans_reload'):
+        st.session_state.pending_trans_reload = True
+        return
+    
+    pending_df = st.session_state.pending_trans_df
+    categories = rows["Categorie"].astype(object)
+    moved = rows.assign(Select=False, Categorie=categories.where(categories.isin(db_category_names), "Overig"))
+    pending_df = pd.concat([pending_df, moved[pending_df.columns]], ignore_index=True)
+    # Keep the DB order (newest first)
+    pending_df = pending_df.sort_values("Datum", ascending=False, kind="stable", ignore_index=True)
+    st.session_state.pending_trans_df = _use_arrow_strings(pending_df)
+    _bump_pending_version()
+    if 'editor_pending' in st.session_state:
+        del st.session_state.editor_pending
+
+def _discard_history_job(action: str, ids: List[str]):
+    """Give up on a history job: bring its rows back and tell the user on the next run."""
+    st.session_state.hist_reload_needed = True
+    if action == "unconfirm" and 'pending_trans_df' in st.session_state:
+        # The rows are still confirmed in the DB, take them out of the pending list again
+        pending_df = st.session_state.pending_trans_df
+        st.session_state.pending_trans_df = pending_df[~pending_df["id"].isin(ids)].reset_index(drop=True)
+        buffer = st.session_state.get("_pending_write_buffer", {})
+        for t_id in ids:
+            buffer.pop(t_id, None)
+        _bump_pending_version()
+        if 'editor_pending' in st.session_state:
+            del st.session_state.editor_pending
+    verb = "teruggezet" if action == "unconfirm" else "verwijderd"
+    st.session_state._history_reload_blocked = True
+    st.session_state._history_job_notice = (f"{len(ids)} transacties konden niet worden {verb} "
+                                            f"na {HISTORY_JOB_MAX_ATTEMPTS} pogingen en staan terug in de historiek.")
+
+def _flush_history_jobs(user_id: str, db_ops: DatabaseOperations) -> bool:
+    """Run the queued history writes, oldest first; False if some are still unwritten.
+
+    A job that keeps failing is discarded after HISTORY_JOB_MAX_ATTEMPTS so it
+    cannot block the jobs queued behind it.
+    """
+    jobs = st.session_state.get("_history_jobs")
+    while jobs:
+        action, ids = jobs[0]
+        if action == "unconfirm":
+            done = db_ops.bulk_update_transactions([{"id": tid, "is_confirmed": False} for tid in ids], user_id)
+        else:
+            done = db_ops.bulk_delete_transactions(ids, user_id)
+        if not done:
+            attempts = st.session_state.get("_history_job_attempts", 0) + 1
+            if attempts < HISTORY_JOB_MAX_ATTEMPTS:
+                st.session_state._history_job_attempts = attempts
+                return False
+            _discard_history_job(action, ids)
+        else:
+            clear_transaction_caches()
+        jobs.pop(0)
+        st.session_state._history_job_attempts = 0
+    return True
+
+@st.fragment(run_every=2.0)
+def _history_job_runner(user_id: str, db_ops: DatabaseOperations):
+    """Periodically run the queued history actions."""
+    if not _flush_history_jobs(user_id, db_ops):
+        st.error("Terugzetten of verwijderen in de historiek is mislukt. Nieuwe poging over enkele seconden...")
+    elif st.session_state.pop("_history_reload_blocked", False):
+        # The history kept its old rows while jobs were queued: redraw it now the queue is empty
+        st.rerun()
 
 def handle_pending_change(user_id: str, db_ops: DatabaseOperations):
     """Callback for st.data_editor on_change in show_pending_review."""
@@ -46,91 +310,66 @@ def handle_pending_change(user_id: str, db_ops: DatabaseOperations):
     df = st.session_state.pending_trans_df
     edits = state["edited_rows"]
     
-    # Rebuild filtered_df to map positions back to actual indices
-    filtered_df = df.copy()
-    search_q = st.session_state.get("pending_search")
-    cat_f = st.session_state.get("pending_cat_opt")
-    
-    if search_q:
-        q = search_q.lower()
-        mask = (
-            filtered_df['Tegenpartij'].str.lower().str.contains(q, na=False) |
-            filtered_df['Categorie'].str.lower().str.contains(q, na=False) |
-            filtered_df['Omschrijving'].str.lower().str.contains(q, na=False) |
-            filtered_df['AI Naam'].str.lower().str.contains(q, na=False) |
-            filtered_df['AI Motivatie'].str.lower().str.contains(q, na=False)
-        )
-        filtered_df = filtered_df[mask]
-    
-    if cat_f and cat_f != "Alle Categorieën":
-        filtered_df = filtered_df[filtered_df['Categorie'] == cat_f]
+    # Editor positions map to df indices as recorded at render time
+    pos_to_idx = st.session_state.get("_pending_pos_to_idx")
+    pos_to_iloc = st.session_state.get("_pending_pos_to_iloc")
+    if pos_to_idx is None or pos_to_iloc is None:
+        return
+    id_col = df.columns.get_loc("id")
 
-    # We need categories for ID lookup - Cache aware
-    if 'user_categories_cache' not in st.session_state:
-         st.session_state.user_categories_cache = db_ops.get_categories(user_id)
-    user_categories = st.session_state.user_categories_cache
-    
-    cat_name_to_id = {c['name']: c['id'] for c in user_categories}
+    # Category ID lookup as built by the last render
+    cat_name_to_id = _get_cat_name_to_id(user_id)
+    selected = _effective_selection(df.loc[pos_to_idx, "Select"], edits)
+    bulk_updates = []
+    edited_rows = []
     
-    for pos_str, changes in edits.items():
+    for pos_str, changes in list(edits.items()):
         pos = int(pos_str)
-        if pos >= len(filtered_df): continue
+        if pos >= len(pos_to_idx): continue
         
-        idx = filtered_df.index[pos]
-        row_id = df.at[idx, 'id']
-        current_row = df.loc[idx]
+        idx = int(pos_to_idx[pos])
+        iloc = int(pos_to_iloc[pos])
+        row_id = df.iat[iloc, id_col]
+        current_row = df.iloc[iloc]
         
         # Determine if we should trigger batch category update
-        if "Categorie" in changes:
+        if "Categorie" in changes and selected[pos]:
             new_cat_name = changes["Categorie"]
-            is_selected = edits.get(pos_str, {}).get("Select", current_row["Select"])
+            c_id = cat_name_to_id.get(new_cat_name)
+            other_pos = np.flatnonzero(selected)
+            other_pos = other_pos[other_pos != pos]
+            other_idx = pos_to_idx[other_pos]
             
-            if is_selected:
-                c_id = cat_name_to_id.get(new_cat_name)
-                # Iterate filtered_df to find other selected rows for visual update
-                for other_pos, (other_idx, row) in enumerate(filtered_df.iterrows()):
-                    other_pos_str = str(other_pos)
-                    other_sel = edits.get(other_pos_str, {}).get("Select", row["Select"])
-                    
-                    if other_sel and other_idx != idx:
-                        if c_id:
-                            db_ops.update_transaction(row['id'], {"categorie_id": c_id}, user_id)
-                        
-                        if other_pos_str not in edits: edits[other_pos_str] = {}
-                        edits[other_pos_str]["Categorie"] = new_cat_name
+            if c_id:
+                bulk_updates.extend({"id": rid, "categorie_id": c_id} for rid in df.loc[other_idx, 'id'])
+            # Update session state DF immediately for optimistic UI
+            df.loc[other_idx, 'Categorie'] = new_cat_name
+            df.loc[other_idx, '_search_blob'] = _build_search_blob(df.loc[other_idx])
+            for other in other_pos:
+                edits.setdefault(str(other), {})["Categorie"] = new_cat_name
 
         # Batch Lopende (Current Account) Logic
-        if "Lopende" in changes:
+        if "Lopende" in changes and selected[pos]:
             new_val = bool(changes["Lopende"])
-            is_selected = edits.get(pos_str, {}).get("Select", current_row["Select"])
+            other_pos = np.flatnonzero(selected)
+            other_pos = other_pos[other_pos != pos]
+            other_idx = pos_to_idx[other_pos]
             
-            if is_selected:
-                # Iterate filtered_df to find other selected rows for visual update
-                for other_pos, (other_idx, row) in enumerate(filtered_df.iterrows()):
-                    other_pos_str = str(other_pos)
-                    other_sel = edits.get(other_pos_str, {}).get("Select", row["Select"])
-                    
-                    if other_sel and other_idx != idx:
-                         db_ops.update_transaction(row['id'], {"is_lopende_rekening": new_val}, user_id)
-                         # Update session state DF immediately for optimistic UI
-                         df.at[other_idx, 'Lopende'] = new_val
-                         
-                         if other_pos_str not in edits: edits[other_pos_str] = {}
-                         edits[other_pos_str]["Lopende"] = new_val
+            bulk_updates.extend({"id": rid, "is_lopende_rekening": new_val} for rid in df.loc[other_idx, 'id'])
+            # Update session state DF immediately for optimistic UI
+            df.loc[other_idx, 'Lopende'] = new_val
+            for other in other_pos:
+                edits.setdefault(str(other), {})["Lopende"] = new_val
 
         # Prepare main row update
         cat_val = changes.get("Categorie", current_row["Categorie"])
         c_id = cat_name_to_id.get(cat_val)
         
-        # Update session state DF immediately
-        if "Select" in changes: df.at[idx, "Select"] = bool(changes["Select"])
-        if "Categorie" in changes: df.at[idx, "Categorie"] = cat_val
-        if "Lopende" in changes: df.at[idx, "Lopende"] = bool(changes["Lopende"])
-        if "Tegenpartij" in changes: df.at[idx, "Tegenpartij"] = str(changes["Tegenpartij"])
-        if "Omschrijving" in changes: df.at[idx, "Omschrijving"] = str(changes["Omschrijving"])
-        if "Bedrag" in changes: df.at[idx, "Bedrag"] = float(changes["Bedrag"])
+        # Queue the session state DF update
+        edited_rows.append((idx, changes))
 
         updates = {
+            "id": row_id,
             "datum": changes.get("Datum", current_row["Datum"]).isoformat() if hasattr(changes.get("Datum", current_row["Datum"]), "isoformat") else str(changes.get("Datum", current_row["Datum"])),
             "bedrag": float(changes.get("Bedrag", current_row["Bedrag"])),
             "naam_tegenpartij": str(changes.get("Tegenpartij", current_row["Tegenpartij"])),
@@ -138,7 +377,35 @@ def handle_pending_change(user_id: str, db_ops: DatabaseOperations):
             "categorie_id": c_id,
             "is_lopende_rekening": bool(changes.get("Lopende", current_row["Lopende"]))
         }
-        db_ops.update_transaction(row_id, updates, user_id)
+        bulk_updates.append(updates)
+
+    # Update session state DF; the DB write is deferred to the write-behind buffer
+    _apply_edits(df, edited_rows)
+    _buffer_pending_writes(bulk_updates)
+    _bump_pending_version()
+
+def _render_quick_add(user_id: str, db_ops: DatabaseOperations):
+    """Render the quick "new category" expander of the pending review."""
+    with st.expander(" Nieuwe Categorie Aanmaken", expanded=False):
+        c1, c2, c3 = st.columns([3, 1, 1])
+        with c1:
+            new_cat_quick = st.text_input("Naam nieuwe categorie", key="quick_cat_name", placeholder="Bijv. Hobby's")
+        with c2:
+            new_cat_color_quick = st.color_picker("Kleur", random.choice(QUICK_ADD_COLORS), key="quick_cat_color")
+        with c3:
+            st.write("") # Spacer
+            if st.button("Toevoegen", key="quick_cat_add"):
+                if new_cat_quick:
+                    new_cat_obj = Category(name=new_cat_quick.strip(), color=new_cat_color_quick)
+                    if db_ops.create_category(new_cat_obj, user_id):
+                        st.success(f"Categorie '{new_cat_quick}' toegevoegd!")
+                        st.session_state.pending_trans_reload = True # Reload to update dropdowns
+                        get_cached_categories.clear() # Invalidate cache
+                        st.rerun()
+                    else:
+                        st.error("Kon categorie niet aanmaken")
+                else:
+                    st.warning("Vul een naam in")
 
 @st.fragment
 def show_pending_review(user_id: str, db_ops: DatabaseOperations):
@@ -159,13 +426,13 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
                 with c3:
                     if st.button("Aanmaken & Toepassen", key=f"btn_create_ai_{i}"):
                         # Create category
-                        from models.category import Category
                         cat_obj = Category(name=new_cat, color=color, rules=[
                             {"field": "ai_category", "contains": [new_cat]} # Dummy rule tracking
                         ])
                         new_id = db_ops.create_category(cat_obj, user_id)
                         
                         if new_id:
+                            get_cached_categories.clear()
                             # Update all transactions that have this ai_category
                             if db_ops.client:
                                 db_ops.client.table("transactions").update({
@@ -185,81 +452,52 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
 
             if st.button("Negeer suggesties", type="secondary"):
                 del st.session_state['new_ai_cats']
-                st.rerun()
+                st.rerun(scope="fragment")
                 
     st.subheader("Onbevestigde Transacties")
     
     # Initialize reload flag
-    if 'pending_trans_reload' not in st.session_state:
-        st.session_state.pending_trans_reload = True
+    st.session_state.setdefault('pending_trans_reload', True)
         
-    # Check if we need to fetch/rebuild
-    if 'pending_trans_df' not in st.session_state or st.session_state.pending_trans_reload:
-        transactions = db_ops.get_transactions(user_id, is_confirmed=False)
-        
-        # Get category list and mapping - CACHED
-        if 'user_categories_cache' not in st.session_state or st.session_state.pending_trans_reload:
-             st.session_state.user_categories_cache = db_ops.get_categories(user_id)
-        
-        user_categories = st.session_state.user_categories_cache
-        
-        # STRICTLY use DB categories
-        db_category_names = sorted([c['name'] for c in user_categories])
-        if "Overig" not in db_category_names:
-            db_category_names.append("Overig")
-            
-        # Convert to DataFrame
-        df_data = []
-        for t in transactions:
-            display_name = t.get('naam_tegenpartij')
-            if not display_name or display_name.strip() in ["", "-", "--", "---"]:
-                display_name = "Onbekend"
-                
-            current_category = t.get('categorie', 'Overig')
-            if current_category not in db_category_names:
-                current_category = "Overig"
-
-            df_data.append({
-                "Select": False,
-                "Datum": datetime.strptime(t['datum'], '%Y-%m-%d').date() if isinstance(t['datum'], str) else t['datum'],
-                "Tegenpartij": display_name,
-                "Bedrag": float(t['bedrag']),
-                "Categorie": current_category,
-                "Lopende": t.get('is_lopende_rekening', False),
-                "Omschrijving": t.get('omschrijving', '') or "",
-                "AI Naam": t.get('ai_name', ''),
-                "AI Motivatie": t.get('ai_reasoning', ''),
-                "Vertrouwen": float(t.get('ai_confidence') or 0.0),
-                "id": t['id'] # Hidden column
-            })
-
+    # Get category list and dropdown options once per rerun - CACHED, refreshed on reload
+    if st.session_state.pending_trans_reload:
+        get_cached_categories.clear()
+    user_categories = get_cached_categories(user_id)
+    # STRICTLY use DB categories
+    db_category_names = _category_options(tuple(c['name'] for c in user_categories))
 
+    # Check if we need to fetch/rebuild
+    needs_reload = 'pending_trans_df' not in st.session_state or st.session_state.pending_trans_reload
+    # Buffered edits and queued history actions must reach the DB before we re-read it;
+    # until they do, keep the current rows (and their unsaved edits) and retry on the next run
+    if needs_reload and not flush_review_writes(user_id, db_ops) and 'pending_trans_df' in st.session_state:
+        st.error(UNSAVED_WRITES_ERROR)
+    elif needs_reload:
+        transactions = db_ops.get_transactions(user_id, is_confirmed=False, columns=RECORD_FIELDS)
         
-        # Convert to DataFrame with predefined columns to avoid KeyError on empty data
-        columns = ["Select", "Datum", "Tegenpartij", "Bedrag", "Categorie", "Lopende", "Omschrijving", "AI Naam", "AI Motivatie", "Vertrouwen", "id"]
-        if df_data:
-            st.session_state.pending_trans_df = pd.DataFrame(df_data)
-        else:
-            st.session_state.pending_trans_df = pd.DataFrame(columns=columns)
+        pending_df = _transactions_frame(transactions)
+        categories = pending_df["Categorie"]
+        pending_df["Categorie"] = categories.where(categories.isin(db_category_names), "Overig")
+        pending_df.insert(0, "Select", False)
+        pending_df["_search_blob"] = _build_search_blob(pending_df)
+        st.session_state.pending_trans_df = _use_arrow_strings(pending_df)
             
         st.session_state.pending_trans_reload = False
+        _bump_pending_version()
         
         # Clear editor state because underlying data changed
         if 'editor_pending' in st.session_state:
             del st.session_state.editor_pending
 
-    # Helpers for Dropdown (Use Cache)
-    user_categories = st.session_state.get('user_categories_cache', [])
-    # Fallback if cache missing (shouldn't happen if logic above is correct, but safety first)
-    if not user_categories:
-        user_categories = db_ops.get_categories(user_id)
-        st.session_state.user_categories_cache = user_categories
+    # Nothing to review: skip filters, engine and editor setup
+    if st.session_state.pending_trans_df.empty:
+        st.info("Geen onbevestigde transacties.")
+        _render_quick_add(user_id, db_ops)
+        return
 
+    # Helpers for Dropdown
     cat_name_to_id = {c['name']: c['id'] for c in user_categories}
-    cat_engine = CategorizationEngine(user_categories)
-    db_category_names = sorted([c['name'] for c in user_categories])
-    if "Overig" not in db_category_names:
-        db_category_names.append("Overig")
+    st.session_state._cat_name_to_id = cat_name_to_id
         
     #  Search and Filter UI
     st.write(f"**{len(st.session_state.pending_trans_df)}** transacties wachten op bevestiging")
@@ -272,48 +510,13 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
         pending_cat_filter = st.selectbox("Categoriefilter", options=cat_options, key="pending_cat_opt", label_visibility="collapsed")
 
     # Apply filters
-    filtered_df = st.session_state.pending_trans_df.copy()
-    if search_query:
-        q = search_query.lower()
-        mask = (
-            filtered_df['Tegenpartij'].str.lower().str.contains(q, na=False) |
-            filtered_df['Categorie'].str.lower().str.contains(q, na=False) |
-            filtered_df['Omschrijving'].str.lower().str.contains(q, na=False) |
-            filtered_df['AI Naam'].str.lower().str.contains(q, na=False) |
-            filtered_df['AI Motivatie'].str.lower().str.contains(q, na=False)
-        )
-        filtered_df = filtered_df[mask]
-    
-    if pending_cat_filter != "Alle Categorieën":
-        filtered_df = filtered_df[filtered_df['Categorie'] == pending_cat_filter]
+    filtered_df = _filter_pending_df(st.session_state.pending_trans_df, search_query, pending_cat_filter)
 
     if filtered_df.empty:
         st.info("Geen transacties gevonden voor deze filters.")
     
     # Quick Add Category 
-    with st.expander(" Nieuwe Categorie Aanmaken", expanded=False):
-        c1, c2, c3 = st.columns([3, 1, 1])
-        with c1:
-            new_cat_quick = st.text_input("Naam nieuwe categorie", key="quick_cat_name", placeholder="Bijv. Hobby's")
-        with c2:
-            import random
-            colors = ["#ef4444", "#f97316", "#f59e0b", "#84cc16", "#10b981", "#06b6d4", "#3b82f6", "#8b5cf6", "#ec4899"]
-            new_cat_color_quick = st.color_picker("Kleur", random.choice(colors), key="quick_cat_color")
-        with c3:
-            st.write("") # Spacer
-            if st.button("Toevoegen", key="quick_cat_add"):
-                if new_cat_quick:
-                    from models.category import Category
-                    new_cat_obj = Category(name=new_cat_quick.strip(), color=new_cat_color_quick)
-                    if db_ops.create_category(new_cat_obj, user_id):
-                        st.success(f"Categorie '{new_cat_quick}' toegevoegd!")
-                        st.session_state.pending_trans_reload = True # Reload to update dropdowns
-                        if 'user_categories_cache' in st.session_state: del st.session_state.user_categories_cache # Invalidate cache
-                        st.rerun()
-                    else:
-                        st.error("Kon categorie niet aanmaken")
-                else:
-                    st.warning("Vul een naam in")
+    _render_quick_add(user_id, db_ops)
             
     # Combined Action Row
     col_confirm, col_delete, col_ai, col_sel_all, col_desel_all = st.columns([1.5, 1.5, 2, 1.5, 1.5])
@@ -327,60 +530,77 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
             # But the 'Select' checkboxes usually trigger rerun or are captured.
             # We'll use the session state DF which is updated by the on_change callback.
             df_to_proc = st.session_state.pending_trans_df
-            for index, row in df_to_proc.iterrows():
-                if row['Select']:
-                    trans_id = row['id']
-                    cat_id = cat_name_to_id.get(row['Categorie'])
+            select = df_to_proc["Select"].to_numpy(dtype=bool)
+            # Nothing selected: skip the flush and the confirm pass entirely
+            if not select.any():
+                st.info("Geen transacties geselecteerd.")
+            # Buffered edits and queued unconfirms must be written before these rows are confirmed
+            elif not flush_review_writes(user_id, db_ops):
+                st.error(UNSAVED_WRITES_ERROR)
+            else:
+                # Re-read: the flush drops rows of a history job it had to give up on
+                df_to_proc = st.session_state.pending_trans_df
+                selected_rows = df_to_proc[df_to_proc["Select"].to_numpy(dtype=bool)]
+                confirm_updates = []
+                for trans_id, cat_name in zip(selected_rows['id'], selected_rows['Categorie']):
+                    cat_id = cat_name_to_id.get(cat_name)
                     if cat_id:
-                        db_ops.update_transaction(trans_id, {"is_confirmed": True, "categorie_id": cat_id}, user_id)
-                        success_count += 1
+                        confirm_updates.append({"id": trans_id, "is_confirmed": True, "categorie_id": cat_id})
+                # One request per distinct category
+                if confirm_updates and db_ops.bulk_update_transactions(confirm_updates, user_id):
+                    success_count = len(confirm_updates)
             
-            if success_count > 0:
-                st.success(f"{success_count} transacties bevestigd!")
-                st.session_state.pending_trans_reload = True
-                st.rerun()
+                if success_count > 0:
+                    st.success(f"{success_count} transacties bevestigd!")
+                    st.session_state.pending_trans_reload = True
+                    st.session_state.hist_reload_needed = True
+                    st.rerun()
 
     with col_delete:
         if st.button("Verwijder", type="secondary", use_container_width=True, help="Verwijder geselecteerde transacties", key="btn_delete_top"):
+            # Flush first: a given-up history job takes its rows out of the pending list
+            written = flush_review_writes(user_id, db_ops)
             df_to_proc = st.session_state.pending_trans_df
             selected_rows = df_to_proc[df_to_proc["Select"] == True]
-            if not selected_rows.empty:
-                deleted_count = 0
-                for _, row in selected_rows.iterrows():
-                    if db_ops.delete_transaction(row['id'], user_id):
-                        deleted_count += 1
+            if not written:
+                st.error(UNSAVED_WRITES_ERROR)
+            elif not selected_rows.empty:
+                ids = selected_rows['id'].tolist()
+                deleted_count = len(ids) if db_ops.bulk_delete_transactions(ids, user_id) else 0
                 if deleted_count > 0:
                     st.success(f"{deleted_count} verwijderd!")
                     st.session_state.pending_trans_reload = True
-                    st.rerun()
+                    st.rerun(scope="fragment") # Only the pending list changes
 
     with col_ai:
         if st.button("AI Optimaliseer", help="Laat de AI agent betere namen en categorieën voorstellen", use_container_width=True, key="btn_ai_top"):
+            written = flush_review_writes(user_id, db_ops)
             df_to_proc = st.session_state.pending_trans_df
             selected_rows = df_to_proc[df_to_proc["Select"] == True]
-            if selected_rows.empty:
+            if not written:
+                st.error(UNSAVED_WRITES_ERROR)
+            elif selected_rows.empty:
                 st.warning("Selecteer eerst transacties.")
             else:
-                from services.ai_categorizer import AiCategorizer
-                from models.transaction import Transaction
                 ai_categorizer = AiCategorizer()
                 if not ai_categorizer.enabled:
                     st.error("AI agent niet geconfigureerd.")
                 else:
                     with st.spinner("AI analyseert..."):
                         # Pass database categories to AI context
-                        user_categories = db_ops.get_categories(user_id)
                         ai_categorizer.set_categories(user_categories)
                         
                         tx_objs = []
-                        for _, r in selected_rows.iterrows():
-                            tx = Transaction(
-                                id=r['id'],
-                                datum=r['Datum'],
-                                bedrag=Decimal(str(r['Bedrag'])),
-                                naam_tegenpartij=r['Tegenpartij'],
-                                omschrijving=r['Omschrijving'],
-                                categorie=r['Categorie']
+                        tx_columns = ["id", "Datum", "Bedrag", "Tegenpartij", "Omschrijving", "Categorie"]
+                        for r_id, r_datum, r_bedrag, r_naam, r_omschrijving, r_cat in selected_rows[tx_columns].itertuples(index=False, name=None):
+                            # Values come from the typed session DF, skip pydantic validation
+                            tx = Transaction.model_construct(
+                                id=r_id,
+                                datum=r_datum,
+                                bedrag=Decimal(str(r_bedrag)),
+                                naam_tegenpartij=r_naam,
+                                omschrijving=r_omschrijving,
+                                categorie=r_cat
                             )
                             tx_objs.append(tx)
                         
@@ -395,9 +615,8 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
                         # 1. If AI suggests KNOWN category -> Update ID immediately
                         # 2. If AI suggests UNKNOWN category -> Update metadata (ai_category) but keep current category_id
                         
-                        user_categories = db_ops.get_categories(user_id)
-                        cat_name_to_id = {c['name']: c['id'] for c in user_categories}
                         new_cats_found = set()
+                        bulk_updates = []
                         
                         for tx in optimized_txs:
                             c_id = None
@@ -411,6 +630,7 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
                                 new_cats_found.add(tx.ai_category)
 
                             updates = {
+                                "id": tx.id,
                                 "naam_tegenpartij": tx.naam_tegenpartij,
                                 "ai_name": tx.ai_name,
                                 "ai_reasoning": tx.ai_reasoning,
@@ -420,7 +640,9 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
                             if c_id:
                                 updates["categorie_id"] = c_id
                                 
-                            db_ops.update_transaction(tx.id, updates, user_id)
+                            bulk_updates.append(updates)
+                        
+                        db_ops.bulk_update_transactions(bulk_updates, user_id)
                         
                         if new_cats_found:
                             st.session_state['new_ai_cats'] = list(new_cats_found)
@@ -430,29 +652,36 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
                              st.info(f" AI suggereert nieuwe categorieën: {', '.join(new_cats_found)}")
                         
                         st.session_state.pending_trans_reload = True
-                        st.rerun()
+                        st.rerun(scope="fragment")
 
     with col_sel_all:
         if st.button("Alles", key="btn_sel_all_top", use_container_width=True, help="Selecteer alle getoonde transacties"):
             st.session_state.pending_trans_df.loc[filtered_df.index, 'Select'] = True
-            st.rerun()
+            _bump_pending_version()
+            st.rerun(scope="fragment") # Selection only concerns this fragment
 
     with col_desel_all:
         if st.button("Niets", key="btn_desel_all_top", use_container_width=True, help="Deselecteer alle getoonde transacties"):
             st.session_state.pending_trans_df.loc[filtered_df.index, 'Select'] = False
-            st.rerun()
+            _bump_pending_version()
+            st.rerun(scope="fragment")
 
 
 
+    # Only the current page is serialized to the frontend
+    page_df = filtered_df.iloc[_editor_page(len(filtered_df), "pending_page", "editor_pending")]
+
     # Calculate height to avoid scrolling (approx 35px per row + 38px header + buffer)
-    # Max height to prevent page becoming too huge, e.g., 2000px
+    # Capped so the editor virtualizes long lists instead of rendering every row
     row_height = 35
     header_height = 40
-    calculated_height = (len(filtered_df) * row_height) + header_height + 10
+    calculated_height = min((len(page_df) * row_height) + header_height + 10, MAX_EDITOR_HEIGHT)
     
     # Display Data Editor
+    st.session_state._pending_pos_to_idx = page_df.index.to_numpy(dtype=np.int64)
+    st.session_state._pending_pos_to_iloc = st.session_state.pending_trans_df.index.get_indexer(page_df.index)
     edited_df = st.data_editor(
-        filtered_df,
+        page_df.drop(columns=EDITOR_HIDDEN_COLUMNS),
         column_config={
             "Select": st.column_config.CheckboxColumn("", width="small", default=False),
             "Datum": st.column_config.DateColumn("Datum", format="DD/MM/YYYY", step=1),
@@ -460,12 +689,10 @@ def show_pending_review(user_id: str, db_ops: DatabaseOperations):
             "Bedrag": st.column_config.NumberColumn("Bedrag", format=" %.2f"),
             "Categorie": st.column_config.SelectboxColumn("Categorie", options=db_category_names, required=True),
             "Lopende": st.column_config.CheckboxColumn("", help="Lopende rekening", default=False, width="small"),
-            "Omschrijving": None, # Hide description
             "AI Naam": st.column_config.TextColumn(" AI Naam", disabled=True),
 
             "AI Motivatie": st.column_config.TextColumn(" Motivatie", disabled=True),
             "Vertrouwen": st.column_config.ProgressColumn(" Vertrouwen", format="%.0f%%", min_value=0, max_value=1),
-            "id": None # Hide ID column
         },
 
         hide_index=True,
@@ -494,84 +721,70 @@ def handle_history_change(user_id: str, db_ops: DatabaseOperations):
     df = st.session_state.history_df_state
     edits = state["edited_rows"]
     
-    # Rebuild filtered_hist to map positions back to actual indices
-    df_filtered = df.copy()
-    search_h = st.session_state.get("history_search")
-    if search_h:
-        q = search_h.lower()
-        mask = (
-            df_filtered['Tegenpartij'].str.lower().str.contains(q, na=False) |
-            df_filtered['Categorie'].str.lower().str.contains(q, na=False) |
-            df_filtered['Omschrijving'].str.lower().str.contains(q, na=False) |
-            df_filtered['AI Naam'].str.lower().str.contains(q, na=False) |
-            df_filtered['AI Motivatie'].str.lower().str.contains(q, na=False)
-        )
-        df_filtered = df_filtered[mask]
-
-    # We need categories for ID lookup - Cache aware
-    if 'user_categories_cache' not in st.session_state:
-         st.session_state.user_categories_cache = db_ops.get_categories(user_id)
-    user_categories = st.session_state.user_categories_cache
-    
-    cat_name_to_id = {c['name']: c['id'] for c in user_categories}
+    # Editor positions map to df indices as recorded at render time
+    pos_to_idx = st.session_state.get("_history_pos_to_idx")
+    pos_to_iloc = st.session_state.get("_history_pos_to_iloc")
+    if pos_to_idx is None or pos_to_iloc is None:
+        return
+    id_col = df.columns.get_loc("id")
+
+    # Category ID lookup as built by the last render
+    cat_name_to_id = _get_cat_name_to_id(user_id)
+    hist_selected = st.session_state.hist_selected
+    selected = _effective_selection(hist_selected[pos_to_iloc], edits)
+    hist_selected[pos_to_iloc] = selected
+    bulk_updates = []
+    edited_rows = []
     
-    for pos_str, changes in edits.items():
+    for pos_str, changes in list(edits.items()):
         pos = int(pos_str)
-        if pos >= len(df_filtered): continue
+        if pos >= len(pos_to_idx): continue
+        # Selection lives in the bitmap only, nothing to persist
+        if changes.keys() <= {"Select"}: continue
         
-        idx = df_filtered.index[pos]
-        row_id = df.at[idx, 'id']
-        current_row = df.loc[idx]
+        idx = int(pos_to_idx[pos])
+        iloc = int(pos_to_iloc[pos])
+        row_id = df.iat[iloc, id_col]
+        current_row = df.iloc[iloc]
         
         # Batch category logic
-        if "Categorie" in changes:
+        if "Categorie" in changes and selected[pos]:
             new_cat_name = changes["Categorie"]
-            is_selected = edits.get(pos_str, {}).get("Select", current_row["Select"])
+            c_id = cat_name_to_id.get(new_cat_name)
+            other_pos = np.flatnonzero(selected)
+            other_pos = other_pos[other_pos != pos]
+            other_idx = pos_to_idx[other_pos]
             
-            if is_selected:
-                c_id = cat_name_to_id.get(new_cat_name)
-                # Iterate df_filtered to find other selected rows for visual update
-                for other_pos, (other_idx, row) in enumerate(df_filtered.iterrows()):
-                    other_pos_str = str(other_pos)
-                    other_sel = edits.get(other_pos_str, {}).get("Select", row["Select"])
-                    
-                    if other_sel and other_idx != idx:
-                        if c_id:
-                            db_ops.update_transaction(row['id'], {"categorie_id": c_id}, user_id)
-                        if other_pos_str not in edits: edits[other_pos_str] = {}
-                        edits[other_pos_str]["Categorie"] = new_cat_name
+            if c_id:
+                bulk_updates.extend({"id": rid, "categorie_id": c_id} for rid in df.loc[other_idx, 'id'])
+            # Update session state DF immediately
+            df.loc[other_idx, 'Categorie'] = new_cat_name
+            df.loc[other_idx, '_search_blob'] = _build_search_blob(df.loc[other_idx])
+            for other in other_pos:
+                edits.setdefault(str(other), {})["Categorie"] = new_cat_name
 
         # Batch Lopende (Current Account) Logic
-        if "Lopende" in changes:
+        if "Lopende" in changes and selected[pos]:
             new_val = bool(changes["Lopende"])
-            is_selected = edits.get(pos_str, {}).get("Select", current_row["Select"])
+            other_pos = np.flatnonzero(selected)
+            other_pos = other_pos[other_pos != pos]
+            other_idx = pos_to_idx[other_pos]
             
-            if is_selected:
-                # Iterate df_filtered to find other selected rows for visual update
-                for other_pos, (other_idx, row) in enumerate(df_filtered.iterrows()):
-                    other_pos_str = str(other_pos)
-                    other_sel = edits.get(other_pos_str, {}).get("Select", row["Select"])
-                    
-                    if other_sel and other_idx != idx:
-                         db_ops.update_transaction(row['id'], {"is_lopende_rekening": new_val}, user_id)
-                         # Update session state DF immediately
-                         df.at[other_idx, 'Lopende'] = new_val
-                         
-                         if other_pos_str not in edits: edits[other_pos_str] = {}
-                         edits[other_pos_str]["Lopende"] = new_val
+            bulk_updates.extend({"id": rid, "is_lopende_rekening": new_val} for rid in df.loc[other_idx, 'id'])
+            # Update session state DF immediately
+            df.loc[other_idx, 'Lopende'] = new_val
+            for other in other_pos:
+                edits.setdefault(str(other), {})["Lopende"] = new_val
 
         # Prepare main row update
         cat_val = changes.get("Categorie", current_row["Categorie"])
         c_id = cat_name_to_id.get(cat_val)
 
-        # Update session state DF immediately
-        if "Categorie" in changes: df.at[idx, "Categorie"] = cat_val
-        if "Lopende" in changes: df.at[idx, "Lopende"] = bool(changes["Lopende"])
-        if "Tegenpartij" in changes: df.at[idx, "Tegenpartij"] = str(changes["Tegenpartij"])
-        if "Omschrijving" in changes: df.at[idx, "Omschrijving"] = str(changes["Omschrijving"])
-        if "Bedrag" in changes: df.at[idx, "Bedrag"] = float(changes["Bedrag"])
+        # Queue the session state DF update
+        edited_rows.append((idx, changes))
         
         updates = {
+            "id": row_id,
             "datum": changes.get("Datum", current_row["Datum"]).isoformat() if hasattr(changes.get("Datum", current_row["Datum"]), "isoformat") else str(changes.get("Datum", current_row["Datum"])),
             "bedrag": float(changes.get("Bedrag", current_row["Bedrag"])),
             "naam_tegenpartij": str(changes.get("Tegenpartij", current_row["Tegenpartij"])),
@@ -579,7 +792,12 @@ def handle_history_change(user_id: str, db_ops: DatabaseOperations):
             "categorie_id": c_id,
             "is_lopende_rekening": bool(changes.get("Lopende", current_row["Lopende"]))
         }
-        db_ops.update_transaction(row_id, updates, user_id)
+        bulk_updates.append(updates)
+
+    # Update session state DF, then persist all edits and propagations in one batch
+    _apply_edits(df, edited_rows, columns=[col for col in EDIT_CASTS if col != "Select"])
+    if bulk_updates and db_ops.bulk_update_transactions(bulk_updates, user_id):
+        clear_transaction_caches()
 
 @st.fragment
 def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
@@ -592,13 +810,10 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
     
     with col1:
         # Use Cache for History too
-        if 'user_categories_cache' not in st.session_state:
-             st.session_state.user_categories_cache = db_ops.get_categories(user_id)
-        user_categories = st.session_state.user_categories_cache
+        user_categories = get_cached_categories(user_id)
 
-        db_valid_cats = sorted([c['name'] for c in user_categories])
-        if "Overig" not in db_valid_cats: db_valid_cats.append("Overig")
-        all_cats = ["Alle"] + db_valid_cats
+        db_category_names = _category_options(tuple(c['name'] for c in user_categories))
+        all_cats = ["Alle"] + db_category_names
         selected_cat = st.selectbox("Categorie", all_cats)
     
     with col2:
@@ -607,115 +822,116 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
     with col3:
         end_date = st.date_input("Tot", value=date.today())
     
-    # 2. CACHING LOGIC
+    # 2. CACHING LOGIC: filters go to the query, one cached result per filter set
     cat_filter = None if selected_cat == "Alle" else selected_cat
     current_filters = {"cat": cat_filter, "start": start_date.isoformat(), "end": end_date.isoformat()}
     
-    if "hist_reload_needed" not in st.session_state:
-        st.session_state.hist_reload_needed = True
-    
+    st.session_state.setdefault("hist_reload_needed", True)
     filters_changed = st.session_state.get("last_hist_filters") != current_filters
     
-    if st.session_state.hist_reload_needed or filters_changed or "history_df_state" not in st.session_state:
-        transactions = db_ops.get_transactions(user_id, is_confirmed=True, category=cat_filter, start_date=start_date, end_date=end_date)
-        df_data = []
-        for t in transactions:
-            display_name = t.get('naam_tegenpartij')
-            if not display_name or display_name.strip() in ["", "-", "--", "---"]: display_name = "Onbekend"
-            df_data.append({
-                "Select": False,
-                "Datum": datetime.strptime(t['datum'], '%Y-%m-%d').date() if isinstance(t['datum'], str) else t['datum'],
-                "Tegenpartij": display_name,
-                "Bedrag": float(t['bedrag']),
-                "Categorie": t.get('categorie', 'Overig'),
-                "Lopende": t.get('is_lopende_rekening', False),
-                "Omschrijving": t.get('omschrijving', '') or "",
-                "AI Naam": t.get('ai_name', ''),
-                "AI Motivatie": t.get('ai_reasoning', ''),
-                "Vertrouwen": float(t.get('ai_confidence') or 0.0),
-                "id": t['id']
-            })
-
-
-        st.session_state.history_df_state = pd.DataFrame(df_data)
-        st.session_state.last_hist_filters = current_filters
+    needs_reload = st.session_state.hist_reload_needed or filters_changed or "history_df_state" not in st.session_state
+    # Queued actions must reach the DB before we re-read it; until then keep the rows we have
+    if needs_reload and not _flush_history_jobs(user_id, db_ops) and "history_df_state" in st.session_state:
+        st.session_state._history_reload_blocked = True
+        st.warning("De historiek wordt bijgewerkt zodra de openstaande acties zijn opgeslagen.")
+    elif needs_reload:
+        st.session_state.pop("_history_reload_blocked", None)
+        if st.session_state.hist_reload_needed:
+            clear_transaction_caches()
+        transactions = get_cached_history(user_id, start_date, end_date, cat_filter)
+        history_df = _transactions_frame(transactions)
+        history_df["_search_blob"] = _build_search_blob(history_df)
+        _use_arrow_strings(history_df)
+        # Few distinct values that are never typed in: store codes instead of repeated strings
+        history_df["Categorie"] = history_df["Categorie"].astype("category")
+        history_df["AI Naam"] = history_df["AI Naam"].astype("category")
+        st.session_state.history_df_state = history_df
+        # Selection is kept apart from the frame, one flag per history row
+        st.session_state.hist_selected = np.zeros(len(history_df), dtype=bool)
         st.session_state.hist_reload_needed = False
+        # Other rows are shown now: drop stale editor positions and the page
+        st.session_state.pop("hist_page", None)
         if 'editor_history' in st.session_state: del st.session_state.editor_history
+        st.session_state.last_hist_filters = current_filters
+    
+    notice = st.session_state.pop("_history_job_notice", None)
+    if notice:
+        st.error(notice)
 
-    df = st.session_state.history_df_state
+    full_df = st.session_state.history_df_state
+    # Every dropdown option must be a valid category, also ones created after the load
+    missing_cats = [name for name in db_category_names if name not in full_df["Categorie"].cat.categories]
+    if missing_cats:
+        full_df["Categorie"] = full_df["Categorie"].cat.add_categories(missing_cats)
+    df = full_df
     if df.empty:
         st.info("Geen bevestigde transacties gevonden voor deze filters")
         return
 
     cat_name_to_id = {c['name']: c['id'] for c in user_categories}
-    db_category_names = sorted([c['name'] for c in user_categories])
-    if "Overig" not in db_category_names: db_category_names.append("Overig")
+    st.session_state._cat_name_to_id = cat_name_to_id
 
     #  Broad Search for History
     st.write(f"**{len(df)}** bevestigde transacties")
     search_hist = st.text_input(" Broad Search", placeholder="Zoek op naam, omschrijving, AI details...", key="history_search", label_visibility="collapsed")
     
     # Apply text filter to history DF
-    filtered_hist = df.copy()
+    filtered_hist = df
     if search_hist:
-        q = search_hist.lower()
-        mask = (
-            filtered_hist['Tegenpartij'].str.lower().str.contains(q, na=False) |
-            filtered_hist['Categorie'].str.lower().str.contains(q, na=False) |
-            filtered_hist['Omschrijving'].str.lower().str.contains(q, na=False) |
-            filtered_hist['AI Naam'].str.lower().str.contains(q, na=False) |
-            filtered_hist['AI Motivatie'].str.lower().str.contains(q, na=False)
-        )
+        mask = _search_mask(filtered_hist["_search_blob"], search_hist)
         filtered_hist = filtered_hist[mask]
     
+    # Selection flags of the shown rows, taken from the bitmap
+    hist_selected = st.session_state.hist_selected
+    hist_iloc = full_df.index.get_indexer(filtered_hist.index)
+    sel_mask = hist_selected[hist_iloc]
+    selected_ids = filtered_hist['id'].to_numpy()[sel_mask].tolist()
+    
     # Combined Action Row for History
     col_unconfirm, col_delete, col_ai, col_sel_all, col_desel_all = st.columns([1.5, 1.5, 2, 1.5, 1.5])
     
     with col_unconfirm:
         if st.button("Onbevestigd", key="btn_unconfirm_hist_top", use_container_width=True, help="Markeer geselecteerde transacties als onbevestigd"):
-            selected_ids = filtered_hist[filtered_hist['Select']]['id'].tolist()
             if selected_ids:
-                for tid in selected_ids: db_ops.update_transaction(tid, {"is_confirmed": False}, user_id)
-                st.success("Transacties teruggezet.")
-                st.session_state.hist_reload_needed = True
-                st.session_state.pending_trans_reload = True
+                # Written in the background by _history_job_runner
+                _move_to_pending(filtered_hist[sel_mask], db_category_names)
+                _queue_history_job("unconfirm", selected_ids)
+                st.success("Transacties worden teruggezet.")
                 st.rerun()
 
     with col_delete:
         if st.button("Verwijder", key="btn_delete_hist_top", use_container_width=True, help="Verwijder geselecteerde transacties definitief"):
-            selected_ids = filtered_hist[filtered_hist['Select']]['id'].tolist()
             if selected_ids:
-                for tid in selected_ids: db_ops.delete_transaction(tid, user_id)
-                st.success("Transacties verwijderd.")
-                st.session_state.hist_reload_needed = True
+                _queue_history_job("delete", selected_ids)
+                st.success("Transacties worden verwijderd.")
                 st.rerun()
 
     with col_ai:
         if st.button("AI Her-cat", key="btn_ai_opt_hist_top", help="Laat de AI agent opnieuw kijken naar de geselecteerde transacties", use_container_width=True):
-            selected_rows = filtered_hist[filtered_hist["Select"] == True]
+            selected_rows = filtered_hist[sel_mask]
             if selected_rows.empty:
                 st.warning("Selecteer eerst transacties.")
             else:
-                from services.ai_categorizer import AiCategorizer
-                from models.transaction import Transaction
                 ai_categorizer = AiCategorizer()
                 
                 with st.spinner("AI wordt uitgevoerd..."):
-                    user_categories = db_ops.get_categories(user_id)
                     ai_categorizer.set_categories(user_categories)
                     
-                    tx_objs = [Transaction(id=r['id'], datum=r['Datum'], bedrag=Decimal(str(r['Bedrag'])), 
-                                          naam_tegenpartij=r['Tegenpartij'], omschrijving=r.get('Omschrijving', ''),
-                                          categorie=r['Categorie']) 
-                              for _, r in selected_rows.iterrows()]
+                    tx_columns = ["id", "Datum", "Bedrag", "Tegenpartij", "Omschrijving", "Categorie"]
+                    # Values come from the typed history DF, skip pydantic validation
+                    tx_objs = [Transaction.model_construct(id=r_id, datum=r_datum, bedrag=Decimal(str(r_bedrag)), 
+                                          naam_tegenpartij=r_naam, omschrijving=r_omschrijving,
+                                          categorie=r_cat) 
+                              for r_id, r_datum, r_bedrag, r_naam, r_omschrijving, r_cat
+                              in selected_rows[tx_columns].itertuples(index=False, name=None)]
                     
-                    cat_name_to_id = {c['name']: c['id'] for c in user_categories}
                     optimized_txs = ai_categorizer.analyze_batch(tx_objs)
 
                     if not any(t.ai_reasoning for t in optimized_txs):
                         st.warning(" Geen AI details gevonden. Controleer of de API key correct is ingesteld in het .env bestand.")
                         return
                     
+                    bulk_updates = []
                     for tx in optimized_txs:
                         # Determine category ID - use AI suggestion if confident, else keep existing
                         new_cat_id = None
@@ -730,6 +946,7 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
                                  pass
                         
                         updates = {
+                            "id": tx.id,
                             "naam_tegenpartij": tx.naam_tegenpartij, 
                             "ai_name": tx.ai_name, 
                             "ai_reasoning": tx.ai_reasoning, 
@@ -740,7 +957,10 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
                         if new_cat_id:
                             updates["categorie_id"] = new_cat_id
                             
-                        db_ops.update_transaction(tx.id, updates, user_id)
+                        bulk_updates.append(updates)
+                    
+                    # Rows with identical results share one request
+                    db_ops.bulk_update_transactions(bulk_updates, user_id)
                     
                     st.success(" Historiek geoptimaliseerd!")
                     st.session_state.hist_reload_needed = True
@@ -748,21 +968,31 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
 
     with col_sel_all:
         if st.button("Alles", key="btn_sel_all_hist_top", use_container_width=True):
-            st.session_state.history_df_state.loc[filtered_hist.index, 'Select'] = True
-            st.rerun()
+            hist_selected[hist_iloc] = True
+            if 'editor_history' in st.session_state: del st.session_state.editor_history
+            st.rerun(scope="fragment") # Selection only concerns this fragment
 
     with col_desel_all:
         if st.button("Niets", key="btn_desel_all_hist_top", use_container_width=True):
-            st.session_state.history_df_state.loc[filtered_hist.index, 'Select'] = False
-            st.rerun()
+            hist_selected[hist_iloc] = False
+            if 'editor_history' in st.session_state: del st.session_state.editor_history
+            st.rerun(scope="fragment")
 
 
+    # Only the current page is serialized to the frontend
+    page_rows = _editor_page(len(filtered_hist), "hist_page", "editor_history")
+    page_hist = filtered_hist.iloc[page_rows]
+
     row_height = 35
     header_height = 40
-    calculated_height = (len(filtered_hist) * row_height) + header_height + 10
+    calculated_height = min((len(page_hist) * row_height) + header_height + 10, MAX_EDITOR_HEIGHT)
     
+    st.session_state._history_pos_to_idx = page_hist.index.to_numpy(dtype=np.int64)
+    st.session_state._history_pos_to_iloc = hist_iloc[page_rows]
+    editor_hist = page_hist.assign(Select=sel_mask[page_rows])
+    editor_hist.insert(0, "Select", editor_hist.pop("Select"))
     edited_df = st.data_editor(
-        filtered_hist,
+        editor_hist.drop(columns=EDITOR_HIDDEN_COLUMNS),
         column_config={
             "Select": st.column_config.CheckboxColumn("", width="small", default=False),
             "Datum": st.column_config.DateColumn("Datum", format="DD/MM/YYYY"),
@@ -770,12 +1000,10 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
             "Bedrag": st.column_config.NumberColumn("Bedrag", format=" %.2f"),
             "Categorie": st.column_config.SelectboxColumn("Categorie", options=db_category_names, required=True),
             "Lopende": st.column_config.CheckboxColumn("", help="Lopende rekening", default=False, width="small"),
-            "Omschrijving": None, # Hide description
             "AI Naam": st.column_config.TextColumn(" AI Naam", disabled=True),
 
             "AI Motivatie": st.column_config.TextColumn(" Motivatie", disabled=True),
             "Vertrouwen": st.column_config.ProgressColumn(" Vertrouwen", format="%.0f%%", min_value=0, max_value=1),
-            "id": None
         },
 
         hide_index=True,
@@ -791,37 +1019,27 @@ def show_confirmed_history(user_id: str, db_ops: DatabaseOperations):
 
 
 
+@st.fragment
 def show_rules_management(user_id: str, db_ops: DatabaseOperations):
     """Show category rules management interface."""
     
     st.subheader("Categorisatieregels Beheren")
     
-    user_categories = db_ops.get_categories(user_id)
+    user_categories = get_cached_categories(user_id)
     
     if not user_categories:
         st.info("Je hebt nog geen aangepaste categorieën. Deze worden automatisch aangemaakt wanneer je transacties corrigeert.")
         return
     
+    # Extract existing keywords from all rules up front
+    category_rules = _split_category_rules(user_categories)
+    
     # Display existing categories and rules
     for category in user_categories:
         with st.expander(f" {category['name']}", expanded=False):
             st.markdown(f"**Kleur:** {category.get('color', '#9ca3af')}")
             
-            rules = category.get('rules', [])
-            # Extract existing keywords from rules
-            current_keywords = set()
-            other_rules = []
-            
-            for rule in rules:
-                field = rule.get('field', '')
-                contains = rule.get('contains', [])
-                
-                # Collect keywords from text-based rules
-                if field in ['naam_tegenpartij', 'omschrijving'] and contains:
-                    current_keywords.update(contains)
-                else:
-                    # Keep non-text rules (like amount conditions) preserved
-                    other_rules.append(rule)
+            current_keywords, other_rules = category_rules[category['id']]
             
             # Form for editing
             with st.form(f"rules_form_{category['id']}"):
@@ -830,7 +1048,7 @@ def show_rules_management(user_id: str, db_ops: DatabaseOperations):
                 
                 keywords_str = st.text_area(
                     "Trefwoorden",
-                    value=", ".join(sorted(current_keywords)),
+                    value=current_keywords,
                     key=f"keywords_{category['id']}",
                     label_visibility="collapsed"
                 )
@@ -856,6 +1074,7 @@ def show_rules_management(user_id: str, db_ops: DatabaseOperations):
                             })
                         
                         if db_ops.update_category_rules(category['id'], new_rules, user_id):
+                            get_cached_categories.clear()
                             st.success("Regels bijgewerkt!")
                             st.rerun()
                         else:
@@ -880,7 +1099,6 @@ def show_rules_management(user_id: str, db_ops: DatabaseOperations):
         
         if submit:
             if new_cat_name:
-                from models.category import Category
                 new_category = Category(
                     name=new_cat_name,
                     color=new_cat_color,
@@ -888,6 +1106,7 @@ def show_rules_management(user_id: str, db_ops: DatabaseOperations):
                 )
                 success = db_ops.create_category(new_category, user_id)
                 if success:
+                    get_cached_categories.clear()
                     st.success(f" Categorie '{new_cat_name}' toegevoegd!")
                     st.rerun()
                 else:
@@ -5,9 +5,12 @@ import streamlit as st
 import pandas as pd
 from textwrap import dedent
 from datetime import datetime, timedelta, date
+from decimal import Decimal
 from database.operations import DatabaseOperations
 from services.analytics import Analytics
 from services.categorization import CategorizationEngine
+from services.ai_categorizer import AiCategorizer
+from models.transaction import Transaction
 from views.components.visualizations import (
     create_monthly_trend_chart,
     create_income_expense_chart,
@@ -16,17 +19,18 @@ from views.components.visualizations import (
     create_year_comparison
 )
 from views.auth import get_current_user
+from services.cached_data import get_cached_transactions, clear_transaction_caches, get_cached_categories, clean_counterparty
 from utils.ui.template_loader import load_template
-from config.settings import DEFAULT_INVESTMENT_GOAL
+from config.settings import DEFAULT_INVESTMENT_GOAL, MAX_EDITOR_HEIGHT
 from typing import List, Dict
 
-@st.cache_data(ttl=300)
-def get_cached_transactions(user_id: str) -> List[Dict]:
-    """Fetch transactions with caching (5 mins)."""
-    db = DatabaseOperations()
-    # We fetch ALL transactions to handle global filtering first
-    # Ideally should perform filtering at SQL level, but for <10k records this is fine
-    return db.get_transactions(user_id, is_confirmed=True)
+MONTH_NAMES = {1: "Januari", 2: "Februari", 3: "Maart", 4: "April", 5: "Mei", 6: "Juni",
+               7: "Juli", 8: "Augustus", 9: "September", 10: "Oktober", 11: "November", 12: "December"}
+
+@st.cache_resource(max_entries=32)
+def get_cat_engine(user_categories: List[Dict]) -> CategorizationEngine:
+    """Build the categorization engine once per distinct category list."""
+    return CategorizationEngine(user_categories)
 
 def show_dashboard():
     """Display main financial dashboard."""
@@ -77,12 +81,9 @@ def show_dashboard():
         with f_col2:
             selected_year = st.selectbox("Jaar", available_years, index=len(available_years)-1, label_visibility="collapsed", key="sel_year_month_mode")
         with f_col3:
-            month_names = {1: "Januari", 2: "Februari", 3: "Maart", 4: "April", 5: "Mei", 6: "Juni", 
-                          7: "Juli", 8: "Augustus", 9: "September", 10: "Oktober", 11: "November", 12: "December"}
             today = date.today()
             default_month = today.month if selected_year == today.year else 1
-            selected_month_name = st.selectbox("Maand", list(month_names.values()), index=default_month-1, label_visibility="collapsed")
-            selected_month = list(month_names.keys())[list(month_names.values()).index(selected_month_name)]
+            selected_month = st.selectbox("Maand", list(MONTH_NAMES), index=default_month-1, format_func=MONTH_NAMES.get, label_visibility="collapsed")
             
         import calendar
         start_date = date(selected_year, selected_month, 1)
@@ -117,7 +118,7 @@ def show_dashboard():
                     start_date, end_date = date_range
                 elif len(date_range) == 1:
                     start_date = end_date = date_range[0]
-             except:
+             except Exception:
                 start_date, end_date = date.today(), date.today()
     
     date_range = (start_date, end_date)
@@ -131,8 +132,8 @@ def show_dashboard():
         
         # Category filter
         st.subheader("Selecteer Categorieën")
-        user_categories = db_ops.get_categories(user.id)
-        cat_engine = CategorizationEngine(user_categories)
+        user_categories = get_cached_categories(user.id)
+        cat_engine = get_cat_engine(user_categories)
         
         # Filter categories: Only show those defined in DB OR used in dashboard transactions
         defined_names = {c['name'] for c in user_categories}
@@ -172,7 +173,7 @@ def show_dashboard():
                 results = db_ops.migrate_transaction_hashes(user.id)
                 if results['success'] > 0 or results['duplicates_removed'] > 0:
                     st.success(f"Klaar! {results['success']} codes vernieuwd, {results['duplicates_removed']} duplicaten verwijderd.")
-                    get_cached_transactions.clear() # Clear cache after update
+                    clear_transaction_caches() # Clear cache after update
                     st.rerun()
                 else:
                     st.info("Geen wijzigingen nodig.")
@@ -200,8 +201,7 @@ def show_dashboard():
     period_label = "Geselecteerde Periode"
     if 'view_mode' in locals():
         if view_mode == "Maand" and start_date:
-            month_names_nl = ["Januari", "Februari", "Maart", "April", "Mei", "Juni", "Juli", "Augustus", "September", "Oktober", "November", "December"]
-            period_label = f"{month_names_nl[start_date.month-1]} {start_date.year}"
+            period_label = f"{MONTH_NAMES[start_date.month]} {start_date.year}"
         elif view_mode == "Jaar" and start_date:
             period_label = f"{start_date.year}"
 
@@ -259,7 +259,7 @@ def show_overview_tab(analytics: Analytics, cat_engine: CategorizationEngine):
         st.subheader("Uitgaven per Categorie")
         category_breakdown = analytics.get_category_breakdown(expense_only=True)
         if category_breakdown:
-            category_colors = cat_engine.get_category_colors()
+            category_colors = cat_engine.category_colors
             fig = create_category_breakdown(category_breakdown, category_colors)
             st.plotly_chart(fig, use_container_width=True)
         else:
@@ -270,22 +270,22 @@ def show_overview_tab(analytics: Analytics, cat_engine: CategorizationEngine):
         top_expenses = analytics.get_top_transactions(n=5, by='amount')
         if top_expenses:
             item_template = load_template("components/top_expense_item.html")
-            colors = cat_engine.get_category_colors()
-            for trans in top_expenses:
+            colors = cat_engine.category_colors
+            display_names = clean_counterparty(pd.Series([t.get('naam_tegenpartij') for t in top_expenses], dtype=object))
+            items = []
+            for trans, display_name in zip(top_expenses, display_names):
                 cat_name = trans.get('categorie', 'Overig')
                 cat_color = colors.get(cat_name, "#9ca3af")
                 
-                display_name = trans.get('naam_tegenpartij')
-                if not display_name or str(display_name).strip() in ["", "-", "--", "---", "nan", "None"]:
-                    display_name = "Onbekend"
-                    
-                st.markdown(item_template.format(
+                items.append(item_template.format(
                     cat_color=cat_color,
                     counterparty=display_name,
                     date=trans['datum'].strftime('%d %b %Y') if hasattr(trans['datum'], 'strftime') else str(trans['datum']),
                     amount=abs(float(trans['bedrag'])),
                     cat_name=cat_name
-                ), unsafe_allow_html=True)
+                ))
+            # One markdown element for the whole list instead of one per item
+            st.markdown("\n".join(items), unsafe_allow_html=True)
         else:
             st.info("Geen transacties")
 
@@ -294,7 +294,7 @@ def show_trends_tab(analytics: Analytics, cat_engine: CategorizationEngine):
     st.subheader("Maandelijkse Trends per Categorie")
     monthly_by_category = analytics.get_monthly_by_category()
     if not monthly_by_category.empty:
-        category_colors = cat_engine.get_category_colors()
+        category_colors = cat_engine.category_colors
         fig = create_monthly_trend_chart(monthly_by_category, category_colors)
         st.plotly_chart(fig, use_container_width=True)
     else:
@@ -420,6 +420,7 @@ def show_budget_comparison(analytics: Analytics, categories: list[dict], user_id
                         all_success = False
                     if c_name == "Investeren":
                         inv_pct = pct
+                get_cached_categories.clear()
                         
                 if all_success and inv_pct is not None:
                     db_ops.create_or_update_preferences(user_id, {"investment_goal_percentage": inv_pct})
@@ -455,7 +456,7 @@ def _style_budget_surplus(row):
         base_styles = [border_style] * 5
         base_styles[4] += f" {style}"
         return base_styles
-    except:
+    except Exception:
         return [border_style] * 5
 
 def show_investments_tab(analytics: Analytics, investment_goal: float):
@@ -526,54 +527,34 @@ def show_lopende_rekening_tab(all_transactions: list, db_ops: DatabaseOperations
     st.metric("Totaal openstaand", f"{total_open:,.2f}")
     st.divider()
     
-    cat_engine = CategorizationEngine(categories)
     # STRICTLY use DB categories
     db_category_names = sorted([c['name'] for c in categories])
     if "Overig" not in db_category_names:
         db_category_names.append("Overig")
     cat_name_to_id = {c['name']: c['id'] for c in categories}
     
-    # Prepare DataFrame for editor
-    df_data = []
-    for t in lopende_trans:
-        display_name = t.get('naam_tegenpartij', 'Onbekend')
-        if not display_name or str(display_name).strip() in ["", "-", "nan"]:
-             display_name = "Onbekend"
-             
-        df_data.append({
+    # --- Session State Management for Data Editor ---
+    # Rebuild only on the first render or when the set of open items changed (e.g. DB update)
+    current_ids = {t['id'] for t in lopende_trans}
+    state_df = st.session_state.get('lopende_df_state')
+    if state_df is None or current_ids != set(state_df['id']):
+        # Prepare DataFrame for editor, column by column
+        st.session_state.lopende_df_state = pd.DataFrame({
             "Select": False,
-            "Datum": t['datum'], # Already datetime/date from analytics processing or raw string? 
-                                 # get_transactions now returns list of dicts. 
-                                 # If cached, they are regular dicts.
-                                 # We need to ensure date type for editor.
-            "Tegenpartij": display_name,
-            "Bedrag": float(t['bedrag']),
-            "Categorie": t.get('categorie', 'Overig'),
+            # Raw string or date depending on the source; normalized to date objects for the editor
+            "Datum": pd.to_datetime(pd.Series([t['datum'] for t in lopende_trans])).dt.date,
+            "Tegenpartij": clean_counterparty(pd.Series([t.get('naam_tegenpartij') for t in lopende_trans], dtype=object)),
+            "Bedrag": [float(t['bedrag']) for t in lopende_trans],
+            "Categorie": [t.get('categorie', 'Overig') for t in lopende_trans],
             "Lopende": True,
-            "Omschrijving": t.get('omschrijving', '') or "",
-            "AI Naam": t.get('ai_name', ''),
-            "AI Motivatie": t.get('ai_reasoning', ''),
-            "Vertrouwen": float(t.get('ai_confidence') or 0.0),
-            "id": t['id']
+            "Omschrijving": [t.get('omschrijving', '') or "" for t in lopende_trans],
+            "AI Naam": [t.get('ai_name', '') for t in lopende_trans],
+            "AI Motivatie": [t.get('ai_reasoning', '') for t in lopende_trans],
+            "Vertrouwen": [float(t.get('ai_confidence') or 0.0) for t in lopende_trans],
+            "id": [t['id'] for t in lopende_trans]
         })
-
-
-        
-    df = pd.DataFrame(df_data)
-    # Ensure Datum is date object
-    df['Datum'] = pd.to_datetime(df['Datum']).dt.date
-
-    # --- Session State Management for Data Editor ---
-    if 'lopende_df_state' not in st.session_state:
-        st.session_state.lopende_df_state = df.copy()
-    else:
-        # Detect external changes (e.g. from DB update)
-        current_ids = set(df['id'])
-        state_ids = set(st.session_state.lopende_df_state['id'])
-        if current_ids != state_ids:
-            st.session_state.lopende_df_state = df.copy()
-            if 'editor_lopende' in st.session_state:
-                 del st.session_state.editor_lopende
+        if state_df is not None and 'editor_lopende' in st.session_state:
+            del st.session_state.editor_lopende
 
     #  Search and Filter UI for Lopende
     col_search_l, col_cat_l = st.columns([3, 1.5])
@@ -600,6 +581,9 @@ def show_lopende_rekening_tab(all_transactions: list, db_ops: DatabaseOperations
     if 'editor_lopende' in st.session_state and 'edited_rows' in st.session_state.editor_lopende:
         edits = st.session_state.editor_lopende['edited_rows']
         if edits:
+            # Collected in edit order and written at once; later entries for an id win
+            lopende_updates = []
+            left_lopende = False
             for row_pos_str, row_changes in edits.items():
                 pos = int(row_pos_str)
                 if pos >= len(filtered_lop): continue
@@ -613,33 +597,35 @@ def show_lopende_rekening_tab(all_transactions: list, db_ops: DatabaseOperations
                     
                     if col == "Categorie" and st.session_state.lopende_df_state.at[idx, "Select"]:
                         new_cat = val
-                        for other_idx in st.session_state.lopende_df_state.index:
-                            if st.session_state.lopende_df_state.at[other_idx, "Select"] and other_idx != idx:
-                                    st.session_state.lopende_df_state.at[other_idx, "Categorie"] = new_cat
-                                    cid = cat_name_to_id.get(new_cat)
-                                    if cid:
-                                        db_ops.update_transaction(st.session_state.lopende_df_state.at[other_idx, 'id'], 
-                                                                {"categorie_id": cid}, user_id)
+                        lop_df = st.session_state.lopende_df_state
+                        # Other selected rows, found with one mask instead of a scan per row
+                        other_idx = lop_df.index[lop_df["Select"].to_numpy(dtype=bool) & (lop_df.index != idx)]
+                        lop_df.loc[other_idx, "Categorie"] = new_cat
+                        cid = cat_name_to_id.get(new_cat)
+                        if cid and len(other_idx):
+                            lopende_updates.extend({"id": tid, "categorie_id": cid} for tid in lop_df.loc[other_idx, 'id'])
                 # Sync to DB
                 row = st.session_state.lopende_df_state.loc[idx]
                 cid = cat_name_to_id.get(row['Categorie'])
-                updates = {
+                lopende_updates.append({
+                    "id": trans_id,
                     "datum": str(row['Datum']),
                     "bedrag": float(row['Bedrag']),
                     "naam_tegenpartij": str(row['Tegenpartij']),
                     "omschrijving": str(row['Omschrijving']),
                     "categorie_id": cid,
                     "is_lopende_rekening": bool(row['Lopende'])
-                }
-                db_ops.update_transaction(trans_id, updates, user_id)
+                })
                 
                 if 'Lopende' in row_changes and not row_changes['Lopende']:
-                    get_cached_transactions.clear()
-                    st.rerun()
+                    left_lopende = True
+            db_ops.bulk_update_transactions(lopende_updates, user_id)
+            if left_lopende:
+                clear_transaction_caches()
             st.rerun()
 
     # Dynamic Height
-    height = (len(filtered_lop) * 35) + 50
+    height = min((len(filtered_lop) * 35) + 50, MAX_EDITOR_HEIGHT)
     
     # Bulk Actions (Moved Top)
     selected_rows = filtered_lop[filtered_lop['Select']]
@@ -658,12 +644,12 @@ def show_lopende_rekening_tab(all_transactions: list, db_ops: DatabaseOperations
         if not selected_rows.empty:
             if st.button(f" Verwijder ({len(selected_rows)})", type="primary", use_container_width=True, key="btn_del_lop_top"):
                 count = 0
-                for tid in selected_rows['id']:
-                     if db_ops.update_transaction(tid, {"is_lopende_rekening": False}, user_id):
-                         count += 1
+                # One request for the whole selection
+                if db_ops.bulk_update_transactions([{"id": tid, "is_lopende_rekening": False} for tid in selected_rows['id']], user_id):
+                    count = len(selected_rows)
                 if count > 0:
                     st.success(f"{count} transacties bijgewerkt.")
-                    get_cached_transactions.clear()
+                    clear_transaction_caches()
                     st.rerun()
         else:
             st.button(f" Verwijder", type="primary", use_container_width=True, disabled=True, key="btn_del_lop_dis")
@@ -671,14 +657,12 @@ def show_lopende_rekening_tab(all_transactions: list, db_ops: DatabaseOperations
     with col_ai_l:
         if not selected_rows.empty:
             if st.button("AI Optimaliseer", use_container_width=True, key="btn_ai_lop_top"):
-                from services.ai_categorizer import AiCategorizer
-                from models.transaction import Transaction
                 ai_categorizer = AiCategorizer()
                 if not ai_categorizer.enabled:
                     st.error("AI agent niet geconfigureerd.")
                 else:
                     with st.spinner("AI analyseert..."):
-                        user_categories = db_ops.get_categories(user_id)
+                        user_categories = get_cached_categories(user_id)
                         ai_categorizer.set_categories(user_categories)
                         cat_name_to_id = {c['name']: c['id'] for c in user_categories}
 
@@ -690,14 +674,16 @@ def show_lopende_rekening_tab(all_transactions: list, db_ops: DatabaseOperations
                         
                         optimized_txs = ai_categorizer.analyze_batch(tx_objs)
                         
+                        bulk_updates = []
                         for tx in optimized_txs:
                             c_id = cat_name_to_id.get(tx.categorie)
-                            updates = {"naam_tegenpartij": tx.naam_tegenpartij, "categorie_id": c_id,
-                                      "ai_name": tx.ai_name, "ai_reasoning": tx.ai_reasoning, "ai_confidence": tx.ai_confidence}
-                            db_ops.update_transaction(tx.id, updates, user_id)
+                            bulk_updates.append({"id": tx.id, "naam_tegenpartij": tx.naam_tegenpartij, "categorie_id": c_id,
+                                                 "ai_name": tx.ai_name, "ai_reasoning": tx.ai_reasoning, "ai_confidence": tx.ai_confidence})
+                        # Rows with identical results share one request
+                        db_ops.bulk_update_transactions(bulk_updates, user_id)
                         
                         st.success(f" {len(optimized_txs)} geoptimaliseerd!")
-                        get_cached_transactions.clear()
+                        clear_transaction_caches()
                         st.rerun()
         else:
              st.button("AI Optimaliseer", use_container_width=True, disabled=True, key="btn_ai_lop_dis")
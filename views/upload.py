@@ -9,6 +9,7 @@ from services.ai_categorizer import AiCategorizer
 from database.operations import DatabaseOperations
 from models.transaction import Transaction
 from views.auth import get_current_user
+from services.cached_data import get_cached_categories
 from models.category import Category
 import pandas as pd
 
@@ -18,14 +19,10 @@ def show_upload_page():
     """Display CSV upload and import interface."""
     
     # Initialize all session state keys at the entry point
-    if 'upload_step' not in st.session_state:
-        st.session_state['upload_step'] = 'upload'
-    if 'parsed_transactions' not in st.session_state:
-        st.session_state['parsed_transactions'] = None
-    if 'suggested_categories' not in st.session_state:
-        st.session_state['suggested_categories'] = None
-    if 'temp_approved_categories' not in st.session_state:
-        st.session_state['temp_approved_categories'] = {}
+    st.session_state.setdefault('upload_step', 'upload')
+    st.session_state.setdefault('parsed_transactions', None)
+    st.session_state.setdefault('suggested_categories', None)
+    st.session_state.setdefault('temp_approved_categories', {})
     
     # Custom Stepper HTML using templates
     steps = ["Uploaden", "Controleren", "Importeren"]
@@ -234,8 +231,7 @@ def show_category_review():
         } for t in transactions])
         
         # We allow editing categories here too
-        db_ops = DatabaseOperations()
-        user_categories = db_ops.get_categories(get_current_user().id)
+        user_categories = get_cached_categories(get_current_user().id)
         db_category_names = sorted([c['name'] for c in user_categories])
         if "Overig" not in db_category_names:
             db_category_names.append("Overig")
@@ -377,19 +373,19 @@ def perform_import(transactions, user_id):
     
     db_ops = DatabaseOperations()
     
-    # Map for name -> id
-    cat_name_to_id = {}
-    
     with st.spinner("Categorieën worden aangemaakt..."):
+        # Map for name -> id, read once; only missing categories cost a round trip
+        cat_name_to_id = {cat['name']: cat['id'] for cat in get_cached_categories(user_id)}
+        
         # Ensure "Overig" exists
-        overig_cat = Category(name="Overig", color="#9ca3af", rules=[])
-        overig_id = db_ops.create_category(overig_cat, user_id)
-        cat_name_to_id["Overig"] = overig_id
+        if "Overig" not in cat_name_to_id:
+            overig_cat = Category(name="Overig", color="#9ca3af", rules=[])
+            cat_name_to_id["Overig"] = db_ops.create_category(overig_cat, user_id)
         
         # Create custom categories from session state in database
         temp_cats = st.session_state.get('temp_approved_categories', {})
         for cat_name, cat_data in temp_cats.items():
-            if cat_name == "Overig": continue
+            if cat_name in cat_name_to_id: continue
             
             # Translate keywords to rules
             rules = []
@@ -414,26 +410,20 @@ def perform_import(transactions, user_id):
                     rules=rules
                 )
                 cat_id = db_ops.create_category(new_cat, user_id)
-                cat_name_to_id[cat_name] = cat_id
+                if cat_id:
+                    cat_name_to_id[cat_name] = cat_id
             except Exception as e:
                 pass
     
+    # New categories were just written; the cached list is stale
+    get_cached_categories.clear()
+
     with st.spinner("Transacties worden geïmporteerd..."):
-        # Get existing categories to map IDs
-        db_categories = db_ops.get_categories(user_id)
-        cat_map = {cat['name']: cat['id'] for cat in db_categories}
-        
-        # Ensure "Overig" exists
-        if "Overig" not in cat_map:
-            overig_cat = Category(name="Overig", color="#9ca3af", rules=[])
-            overig_id = db_ops.create_category(overig_cat, user_id)
-            cat_map["Overig"] = overig_id
-        
-        overig_id = cat_map["Overig"]
+        overig_id = cat_name_to_id["Overig"]
 
         # Link transactions to category IDs based on AI or rule results
         for t in transactions:
-            t.categorie_id = cat_map.get(t.categorie, overig_id)
+            t.categorie_id = cat_name_to_id.get(t.categorie, overig_id)
                 
         result = db_ops.insert_transactions(transactions, user_id)
 